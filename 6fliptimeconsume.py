@@ -6,15 +6,26 @@ import sys
 import time
 import random
 import re
+import argparse
 import atexit
+import hashlib
+import os
+import zlib
+import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Set
+from typing import Dict, List, Optional, Any, Set, Tuple
 from pathlib import Path
 from contextlib import contextmanager
 from urllib.parse import quote_plus, urlparse, parse_qs
 
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
+import soupsieve as sv
+import lxml.html
+from lxml import etree
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -27,7 +38,13 @@ from selenium.common.exceptions import (
     NoSuchElementException,
     StaleElementReferenceException
 )
-from webdriver_manager.chrome import ChromeDriverManager
+
+from scraper_common import (
+    FlipkartProduct, stable_id, resolve_chromedriver, BrowserPool, JsonlWriter, RunSummary,
+    IdJournal, new_seen_ids, SeenIndex, AdaptiveRateLimiter, RetryPolicy, HttpCache,
+    CachingAdapter, StageTimings, time_connections, timing_context, extract_page_state,
+    iter_state_products, state_get, ResumableOutputMixin
+)
 
 # ==================== CONFIGURATION ====================
 
@@ -38,11 +55,54 @@ class ScraperConfig:
         self.headless: bool = True
         self.max_pages: int = 5
         self.timeout: int = 12  # page load / request timeout
-        self.min_delay: float = 0.15  # lowered for near-1s/page when safe
-        self.max_delay: float = 0.4
+        # Adaptive pacing (replaces the fixed random delay): requests/second, raised by rate_increase per
+        # good response and multiplied by rate_decrease on 429/403/503, captcha pages or latency spikes
+        self.rate_initial: float = 2.0
+        self.rate_min: float = 0.2
+        self.rate_max: float = 8.0
+        self.rate_increase: float = 0.25
+        self.rate_decrease: float = 0.5
         self.retry_attempts: int = 3
-        self.retry_delay: float = 1.0
+        self.retry_delay: float = 1.0  # base delay of the exponential backoff
+        self.retry_max_delay: float = 8.0
+        self.retry_deadline: float = 20.0  # total seconds per HTTP fetch, retries included
+        # Blocked/captcha pages skip the anchor and browser fallbacks and are refetched this many
+        # times after a backoff, each time on a fresh session (new cookies and connections)
+        self.block_retries: int = 1
+        # On-disk HTTP cache for the fast path (None disables; --http-cache enables); TTL in seconds
+        # per URL fragment
+        self.http_cache_dir: Optional[str] = None
+        self.http_cache_ttl: Dict[str, float] = {'flipkart.com/search': 600}
+        self.http_cache_max_mb: int = 256
+        # Conditional fetches: ETag/Last-Modified plus parsed products kept per URL (None disables;
+        # --revalidate enables)
+        self.revalidate_dir: Optional[str] = None
         self.save_interval: int = 100
+        # Output: 'json' writes one pretty-printed dump at the end; 'jsonl' (--jsonl) appends one
+        # product per line to a single file as pages are parsed; compression is None, 'gzip' or 'zstd'
+        self.output_format: str = 'json'
+        self.output_compression: Optional[str] = None
+        self.output_file: Optional[str] = None
+        self.fsync_every: int = 200          # lines between fsyncs of the output stream
+        self.fsync_seconds: float = 5.0      # ...or seconds, whichever comes first
+        # Resumable runs (JSONL only): done pages, seen-id log and output offset for --resume
+        self.checkpoint_file: str = 'flipkart_checkpoint.json'
+        self.resume: bool = False
+        # Cross-run dedup: SQLite index of product id -> content hash, so only products that are new
+        # or changed since earlier runs get written (None disables; --dedup-index enables). 'preload'
+        # reads the index into memory at startup; 'mmap' memory-maps the database and looks ids up in place
+        self.dedup_index_file: Optional[str] = None
+        self.dedup_index_mode: str = 'preload'
+        # In-run id dedup: 'exact' (a set) or 'bloom' (scalable Bloom filter, bounded bits per id for
+        # multi-million-item crawls; a new product is wrongly dropped with probability dedup_error_rate)
+        self.dedup_backend: str = 'exact'
+        self.dedup_error_rate: float = 0.001
+        self.dedup_initial_capacity: int = 100_000
+        # >1 fetches that many result pages at once
+        self.max_workers: int = 1
+        # Chrome instances for the rendering fallback; >1 renders pages in parallel (with max_workers > 1)
+        self.browser_pool_size: int = 1
+        self.browser_recycle_after: int = 50  # pages per driver before it is restarted
         self.user_agents: List[str] = [
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
@@ -90,31 +150,61 @@ class ScraperConfig:
         # Minimum expected per-page items; if below this, run anchor fallback
         self.min_products_threshold = 10
 
-# ==================== DATA MODELS ====================
-
-class FlipkartProduct:
-    """Validated product data model"""
-    def __init__(self, **kwargs):
-        self.title: str = kwargs.get('title', '').strip()
-        self.product_id: str = kwargs.get('product_id', '')
-        self.price: int = kwargs.get('price', 0)
-        self.original_price: int = kwargs.get('original_price', 0)
-        self.discount: int = kwargs.get('discount', 0)
-        self.rating: float = kwargs.get('rating', 0.0)
-        self.rating_count: int = kwargs.get('rating_count', 0)
-        self.brand: str = kwargs.get('brand', '').strip()
-        self.product_url: str = kwargs.get('product_url', '')
-        self.in_stock: bool = kwargs.get('in_stock', True)
-        self.thumbnail: str = kwargs.get('thumbnail', '')
-        self.page_number: int = kwargs.get('page_number', 0)
-        self.timestamp: str = kwargs.get('timestamp', datetime.now().isoformat())
-
-    def is_valid(self) -> bool:
-        """Validate essential fields"""
-        return bool(self.title and self.product_id and self.price > 0)
-
-    def to_dict(self) -> Dict[str, Any]:
-        return self.__dict__
+        # Read products from the page-state JSON embedded in the HTML before any CSS parsing
+        self.use_page_state: bool = True
+        # Parse soup cards with the compiled one-pass SelectorPlan instead of per-selector select()
+        self.use_selector_plan: bool = True
+        self._selector_plan = None
+        self._selector_plan_source = None
+
+        # HTML card parser: 'soup' (BeautifulSoup) or 'lxml' (compiled XPath on lxml.html, no BS4)
+        self.parser_backend: str = 'soup'
+        self._lxml_backend = None
+        self._lxml_backend_source = None
+
+        # Browser fallback: extract all cards with one execute_script per page instead of a call per field
+        self.in_page_extraction: bool = True
+
+        # Browser requests dropped via CDP Network.setBlockedURLs; only the document, stylesheets, scripts and
+        # XHRs go through on the browser fallback (product data never needs images, fonts, media or trackers)
+        self.block_resources: bool = True
+        self.blocked_url_patterns: List[str] = [
+            '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+            '*.woff', '*.woff2', '*.ttf', '*.otf',
+            '*.mp4', '*.webm', '*.m3u8',
+            '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+            '*googlesyndication.com*', '*facebook.net*', '*omtrdc.net*', '*hotjar.com*'
+        ]
+        # CSS is kept by default: without it hidden elements show up in innerText and card text changes
+        self.block_stylesheets: bool = False
+
+        # Scroll completion: done after scroll_quiet_ms without DOM changes, capped at scroll_max_wait seconds
+        self.scroll_quiet_ms: int = 300
+        self.scroll_max_wait: float = 2.0
+
+        # Browser fallback reads products from the page's own JSON (hydration state, then the
+        # rome.api page-fetch responses captured through CDP) before touching the DOM
+        self.capture_api: bool = True
+        self.api_capture_pattern: str = r'rome\.api\.flipkart\.com/api/\d+/page/'
+        self.api_capture_timeout: float = 3.0  # seconds to wait for a page-fetch response
+
+        # Per-stage timing histograms are always collected (see StageTimings); the p50/p95/p99
+        # table is printed with the summary and the full histograms are written here (None: don't)
+        self.timings_file: Optional[str] = 'flipkart_timings.json'
+
+    def selector_plan(self) -> 'SelectorPlan':
+        """Selectors compiled once per config (recompiled only if self.selectors is replaced)"""
+        if self._selector_plan is None or self._selector_plan_source is not self.selectors:
+            self._selector_plan = SelectorPlan(self.selectors)
+            self._selector_plan_source = self.selectors
+        return self._selector_plan
+
+    def lxml_backend(self) -> 'LxmlBackend':
+        """lxml XPath selectors compiled once per config"""
+        if self._lxml_backend is None or self._lxml_backend_source is not self.selectors:
+            self._lxml_backend = LxmlBackend(self.selectors)
+            self._lxml_backend_source = self.selectors
+        return self._lxml_backend
 
 # ==================== SOUP ELEMENT ADAPTER ====================
 
@@ -152,41 +242,584 @@ class SoupElementWrapper:
     def text(self):
         return self.e.get_text(separator=" ", strip=True) if self.e else ""
 
+# ==================== SELECTOR PLAN ====================
+
+class SelectorPlan:
+    """
+    Card-field selectors compiled once with soupsieve.
+
+    match() walks a card's descendants a single time, testing each tag only against the
+    variants whose selector can match that tag name, and collects the first matching node
+    of every variant for every field. Once a field's currently top-ranked variant has
+    matched, its other variants are no longer tested. Variants are re-ranked by how often
+    they produced the field value, so the selector that usually wins is tried first.
+    """
+    FIELDS = ('title', 'brand', 'current_price', 'original_price', 'rating',
+              'rating_count', 'out_of_stock', 'image', 'link')
+    # internal lookups used by the product-id / title fallbacks
+    EXTRA_FIELDS = {'id_link': 'a[href*="/p/"], a[href*="pid="]', 'anchor': 'a'}
+    # fields where any hit settles the answer
+    EXISTENCE_FIELDS = ('out_of_stock',)
+    relearn_every = 50
+
+    def __init__(self, selectors: Dict[str, Any]):
+        self.variants: Dict[str, List[Any]] = {}
+        self.order: Dict[str, List[int]] = {}
+        self.wins: Dict[str, List[int]] = {}
+        self._by_tag: Dict[str, List[tuple]] = {}
+        self._any_tag: List[tuple] = []
+        self._cards = 0
+
+        fields = {f: selectors.get(f, []) for f in self.FIELDS}
+        fields.update(self.EXTRA_FIELDS)
+        for field, sels in fields.items():
+            if isinstance(sels, str):
+                sels = [sels]
+            compiled = []
+            for sel in sels:
+                try:
+                    pattern = sv.compile(sel)
+                except Exception:
+                    continue
+                entry = (field, len(compiled), self._fast_matcher(sel) or pattern.match)
+                compiled.append(pattern)
+                tags = self._tag_names(sel)
+                if tags is None:
+                    self._any_tag.append(entry)
+                else:
+                    for tag in tags:
+                        self._by_tag.setdefault(tag, []).append(entry)
+            self.variants[field] = compiled
+            self.order[field] = list(range(len(compiled)))
+            self.wins[field] = [0] * len(compiled)
+
+    @staticmethod
+    def _fast_matcher(selector: str):
+        """
+        Plain-Python test for the simple shapes the config uses (`tag.class`, `tag[attr]`,
+        `tag[attr*="v"]`); soupsieve.match per node is far slower. None for anything else.
+        """
+        sel = selector.strip()
+        m = re.match(r'^[a-zA-Z][\w-]*\.([\w-]+)$', sel)
+        if m:
+            cls = m.group(1)
+            return lambda node: cls in (node.get('class') or ())
+        m = re.match(r'^[a-zA-Z][\w-]*\[([\w-]+)\]$', sel)
+        if m:
+            attr = m.group(1)
+            return lambda node: node.get(attr) is not None
+        m = re.match(r'^[a-zA-Z][\w-]*\[([\w-]+)\*="([^"]+)"\]$', sel)
+        if m:
+            attr, needle = m.groups()
+
+            def contains(node):
+                value = node.get(attr)
+                if isinstance(value, list):  # multi-valued attributes such as class
+                    value = " ".join(value)
+                return bool(value) and needle in value
+            return contains
+        return None
+
+    @staticmethod
+    def _tag_names(selector: str) -> Optional[Set[str]]:
+        """Tag names a selector group can match, or None if any tag could match."""
+        tags = set()
+        for part in re.sub(r'\[[^\]]*\]', '', selector).split(','):
+            part = part.strip()
+            m = re.match(r'^([a-zA-Z][\w-]*)', part)
+            if not m or re.search(r'[\s>+~]', part):
+                return None
+            tags.add(m.group(1).lower())
+        return tags
+
+    def match(self, card, exhaustive: bool = False) -> Dict[str, Dict[int, Any]]:
+        """One pass over the card: {field: {variant index: first matching node}}."""
+        hits: Dict[str, Dict[int, Any]] = {field: {} for field in self.variants}
+        top = {field: order[0] for field, order in self.order.items() if order}
+        done: Set[str] = set()
+
+        for node in card.descendants:
+            name = getattr(node, 'name', None)
+            if name is None:
+                continue
+            for entries in (self._by_tag.get(name, ()), self._any_tag):
+                for field, idx, matches in entries:
+                    if field in done or idx in hits[field]:
+                        continue
+                    if matches(node):
+                        hits[field][idx] = node
+                        if not exhaustive and (idx == top[field] or field in self.EXISTENCE_FIELDS):
+                            done.add(field)
+        return hits
+
+    def ranked(self, field: str) -> List[int]:
+        return self.order.get(field, [])
+
+    def record(self, field: str, idx: int):
+        """Count a win for a variant (lost increments under threads only delay re-ranking)."""
+        self.wins[field][idx] += 1
+
+    def card_done(self):
+        self._cards += 1
+        if self._cards % self.relearn_every == 0:
+            for field, wins in self.wins.items():
+                self.order[field] = sorted(range(len(wins)), key=lambda i: (-wins[i], i))
+
+def _soup_text(node) -> str:
+    return node.get_text(separator=" ", strip=True)
+
+def _soup_title_or_text(node) -> str:
+    """title attribute first, then text (same rule as _get_text_with_fallbacks)"""
+    title = node.get("title")
+    if title:
+        return title.strip()
+    return _soup_text(node)
+
+def _soup_price(node) -> Optional[int]:
+    digits = re.sub(r'[^\d]', '', _soup_title_or_text(node))
+    return int(digits) if digits else None
+
+# ==================== LXML BACKEND ====================
+
+class LxmlBackend:
+    """
+    Direct lxml parser backend (ScraperConfig.parser_backend = 'lxml').
+
+    Every configured selector is translated once to a compiled XPath scoped to descendants,
+    matching soup.select semantics, and evaluated straight on lxml.html elements; no
+    BeautifulSoup objects or per-node wrappers are created. Needs the `cssselect` package.
+    """
+    def __init__(self, selectors: Dict[str, Any]):
+        try:
+            from cssselect import HTMLTranslator
+        except ImportError as e:
+            raise ImportError("parser_backend='lxml' requires cssselect: pip install cssselect") from e
+        translator = HTMLTranslator()
+
+        def compile_group(sels) -> Optional[etree.XPath]:
+            try:
+                return etree.XPath(translator.css_to_xpath(sels, prefix='descendant-or-self::'))
+            except Exception:
+                return None
+
+        def compile_scoped(sel) -> Optional[etree.XPath]:
+            try:
+                return etree.XPath(translator.css_to_xpath(sel, prefix='descendant::'))
+            except Exception:
+                return None
+
+        self.container = compile_group(selectors['product_container'])
+        self.anchors = compile_group('a[href*="/p/"], a[href*="pid="], a._1fQZEK, a.s1Q9rs')
+        self.probe = compile_scoped(', '.join(
+            selectors['current_price'] + selectors['image'] + selectors['title']
+        ))
+        self.fields: Dict[str, List[etree.XPath]] = {}
+        for field in SelectorPlan.FIELDS:
+            sels = selectors.get(field, [])
+            if isinstance(sels, str):
+                sels = [sels]
+            self.fields[field] = [x for x in (compile_scoped(s) for s in sels) if x is not None]
+        self.link = compile_scoped(selectors['link'])
+        self.id_link = compile_scoped('a[href*="/p/"], a[href*="pid="]')
+        self.anchor = compile_scoped('a')
+
+    def first(self, xpath: Optional[etree.XPath], card):
+        if xpath is None:
+            return None
+        nodes = xpath(card)
+        return nodes[0] if nodes else None
+
+    def pick(self, field: str, card, getter):
+        """First non-empty value in selector order (same rule as _get_text_with_fallbacks)."""
+        for xpath in self.fields[field]:
+            nodes = xpath(card)
+            if nodes:
+                value = getter(nodes[0])
+                if value:
+                    return value
+        return None
+
+    def exists(self, field: str, card) -> bool:
+        return any(xpath(card) for xpath in self.fields[field])
+
+# get_text() leaves out script/style/template strings; itertext() would not
+_LXML_VISIBLE_TEXT = etree.XPath(
+    './/text()[not(ancestor::script or ancestor::style or ancestor::template)]'
+)
+
+def _lxml_text(node) -> str:
+    """Equivalent of get_text(separator=" ", strip=True)"""
+    return " ".join(t.strip() for t in _LXML_VISIBLE_TEXT(node) if t.strip())
+
+def _lxml_title_or_text(node) -> str:
+    title = node.get("title")
+    if title:
+        return title.strip()
+    return _lxml_text(node)
+
+def _lxml_price(node) -> Optional[int]:
+    digits = re.sub(r'[^\d]', '', _lxml_title_or_text(node))
+    return int(digits) if digits else None
+
+# ==================== HTTP CACHE ====================
+
+class PageValidators:
+    """
+    Per-URL validators (ETag / Last-Modified) and the products parsed from that response,
+    one small compressed file per URL, so a page answered with 304 is never parsed again.
+    """
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, url: str) -> Path:
+        return self.directory / f"{hashlib.sha256(url.encode()).hexdigest()}.z"
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(zlib.decompress(self._path(url).read_bytes()))
+        except (OSError, ValueError, zlib.error):
+            return None
+
+    def put(self, url: str, etag: Optional[str], last_modified: Optional[str],
+            strategy: str, products: List[Dict[str, Any]]):
+        if not (etag or last_modified):
+            return
+        record = {
+            'etag': etag,
+            'last_modified': last_modified,
+            'strategy': strategy,
+            'products': products
+        }
+        path = self._path(url)
+        try:
+            tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(zlib.compress(json.dumps(record, ensure_ascii=False).encode('utf-8')))
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def conditional_headers(record: Dict[str, Any]) -> Dict[str, str]:
+        headers = {}
+        if record.get('etag'):
+            headers['If-None-Match'] = record['etag']
+        if record.get('last_modified'):
+            headers['If-Modified-Since'] = record['last_modified']
+        return headers
+
+# ==================== PAGE DOCUMENT ====================
+
+class PageDocument:
+    """
+    One fetched search-results page. The HTML is downloaded once and parsed lazily at most
+    once; every request-side extraction strategy runs against the same tree.
+    """
+    def __init__(self, url: str, page: int, status_code: int = 0, content: bytes = b"",
+                 encoding: Optional[str] = None):
+        self.url = url
+        self.page = page
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding or "utf-8"
+        self.products: List[FlipkartProduct] = []
+        self.strategy: Optional[str] = None  # state / container / anchor / browser / browser_anchor / none
+        self.fetch: Optional[str] = None  # fetched / cached / revalidated (304, products reused)
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self._html: Optional[str] = None
+        self._soup: Optional[BeautifulSoup] = None
+        self._tree = None
+        self._verdict: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code == 200 and bool(self.content)
+
+    @property
+    def verdict(self) -> str:
+        """classify_page result (a 304 reuses a page that was already 'ok')"""
+        if self._verdict is None:
+            self._verdict = 'ok' if self.fetch == 'revalidated' else classify_page(self.status_code, self.content)
+        return self._verdict
+
+    @property
+    def html(self) -> str:
+        if self._html is None:
+            self._html = self.content.decode(self.encoding, errors="replace")
+        return self._html
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.html, "lxml")
+        return self._soup
+
+    @property
+    def tree(self):
+        """lxml.html document for the lxml backend (parsed from the raw bytes)"""
+        if self._tree is None:
+            parser = lxml.html.HTMLParser(encoding=self.encoding)
+            self._tree = lxml.html.document_fromstring(self.content, parser=parser)
+        return self._tree
+
+    def parse(self, backend: str = 'soup'):
+        """Build the tree the given parser backend reads, ahead of the strategies that use it"""
+        return self.tree if backend == 'lxml' else self.soup
+
+# ==================== IN-PAGE EXTRACTION ====================
+
+# Runs inside the browser via execute_script(script, selectors, anchor_mode). Applies the same
+# selector fallbacks as _parse_product to every card and returns raw strings for all of them,
+# so a rendered page costs one round-trip instead of several per field per card. With
+# anchor_mode the cards are found like the anchor strategy: product links, climbing to the
+# nearest ancestor that holds a price, image or title.
+EXTRACT_CARDS_JS = r"""
+const sel = arguments[0];
+const anchorMode = arguments[1];
+const first = (card, selector) => {
+    try { return card.querySelector(selector); } catch (e) { return null; }
+};
+const pick = (card, selectors, numeric) => {
+    for (const s of selectors) {
+        const el = first(card, s);
+        if (!el) continue;
+        const text = (el.getAttribute('title') || '').trim() || (el.innerText || '').trim();
+        if (text && (!numeric || /\d/.test(text))) return text;
+    }
+    return '';
+};
+const outOfStock = sel.out_of_stock.join(',');
+const parse = (card, anchorHref) => {
+    const anchor = card.querySelector('a');
+    const idLink = first(card, 'a[href*="/p/"], a[href*="pid="]');
+    const link = first(card, sel.link);
+    let image = '';
+    for (const s of sel.image) {
+        const img = first(card, s);
+        const src = img && (img.getAttribute('src') || img.getAttribute('data-src'));
+        if (src) { image = src; break; }
+    }
+    return {
+        id: card.getAttribute('data-id') || card.getAttribute('data-pid') || card.getAttribute('data-product-id') || '',
+        id_href: idLink ? idLink.href : '',
+        anchor_text: anchor ? (anchor.innerText || '').trim() : null,
+        title: pick(card, sel.title),
+        brand: pick(card, sel.brand),
+        price: pick(card, sel.current_price, true),
+        original_price: pick(card, sel.original_price, true),
+        rating: pick(card, sel.rating),
+        rating_count: pick(card, sel.rating_count),
+        out_of_stock: first(card, outOfStock) !== null,
+        link: link ? (link.getAttribute('href') || '') : '',
+        own_href: card.getAttribute('href') || '',
+        anchor_href: anchorHref,
+        image: image
+    };
+};
+if (!anchorMode) {
+    return Array.from(document.querySelectorAll(sel.product_container), (card) => parse(card, ''));
+}
+const probe = sel.current_price.concat(sel.image, sel.title).join(', ');
+const seen = new Set();
+const cards = [];
+for (const a of document.querySelectorAll('a[href*="/p/"], a[href*="pid="], a._1fQZEK, a.s1Q9rs')) {
+    const href = a.href;
+    if (!href || seen.has(href)) continue;
+    seen.add(href);
+    let candidate = null;
+    let node = a;
+    for (let i = 0; i < 5 && node; i++) {
+        if (first(node, probe)) { candidate = node; break; }
+        node = node.parentElement;
+    }
+    cards.push(parse(candidate || a.parentElement || a, href));
+}
+return cards;
+"""
+
+# Scrolls to the bottom and resolves once the page goes quiet: every DOM mutation restarts a
+# short quiet timer; when it fires the page is scrolled again if the product count grew (or the
+# loader is still showing), otherwise the wait ends. max_ms is a hard cap.
+SCROLL_UNTIL_SETTLED_JS = r"""
+const opts = arguments[0];
+const done = arguments[arguments.length - 1];
+const started = Date.now();
+const count = () => document.querySelectorAll(opts.container).length;
+let last = count();
+let quietTimer = null;
+let capTimer = null;
+const finish = (reason) => {
+    observer.disconnect();
+    clearTimeout(quietTimer);
+    clearTimeout(capTimer);
+    done({products: count(), reason: reason, ms: Date.now() - started});
+};
+const check = () => {
+    const now = count();
+    if (now > last || document.querySelector(opts.loader)) {
+        last = now;
+        window.scrollTo(0, document.body.scrollHeight);
+        restart();
+    } else {
+        finish('settled');
+    }
+};
+const restart = () => {
+    clearTimeout(quietTimer);
+    quietTimer = setTimeout(check, opts.quiet_ms);
+};
+const observer = new MutationObserver(restart);
+observer.observe(document.body, {childList: true, subtree: true});
+capTimer = setTimeout(() => finish('cap'), opts.max_ms);
+window.scrollTo(0, document.body.scrollHeight);
+restart();
+"""
+
+# ==================== RESOURCE BLOCKING ====================
+
+def block_resources(driver, patterns: List[str]):
+    """Drop matching requests inside Chrome (CDP) so they never reach the network"""
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+
+def read_network_log(driver) -> List[Dict[str, Any]]:
+    """Performance-log entries since the last read (reading drains the log)"""
+    try:
+        return driver.get_log('performance')
+    except Exception:
+        return []
+
+def count_requests(entries: List[Dict[str, Any]]) -> tuple[int, int]:
+    """(allowed, blocked) browser requests in a batch of performance-log entries"""
+    sent = blocked = 0
+    for entry in entries:
+        message = entry.get('message', '')
+        if '"Network.requestWillBeSent"' in message:
+            sent += 1
+        elif '"Network.loadingFailed"' in message and '"blockedReason"' in message:
+            blocked += 1
+    return sent - blocked, blocked
+
+# ==================== PAGE CLASSIFIER ====================
+
+BLOCK_STATUSES = frozenset({403, 429, 503})
+CAPTCHA_MARKERS = (b'captcha', b'are you a human', b'verify you are human')
+BLOCK_MARKERS = (b'access denied', b'unusual traffic', b'request blocked', b'something is not right')
+EMPTY_MARKERS = (b'sorry, no results found', b'did not match any products')
+SMALL_PAGE_BYTES = 50_000  # a real results page is several hundred KB
+
+BLOCK_VERDICTS = ('blocked', 'captcha')  # worth a backoff and a fresh session
+TERMINAL_VERDICTS = BLOCK_VERDICTS + ('empty',)  # no fallback strategy can recover these
+
+def classify_page(status_code: int, content: bytes) -> str:
+    """
+    Verdict on a fetched results page from status, size and markers, before any parsing:
+    'blocked', 'captcha', 'empty' (a genuine no-results page), 'error' (no usable
+    response) or 'ok'. Only small bodies are lowercased; big pages cost two byte scans.
+    """
+    if status_code in BLOCK_STATUSES:
+        return 'blocked'
+    if status_code != 200 or not content:
+        return 'error'
+    if len(content) < SMALL_PAGE_BYTES:
+        text = content.lower()
+        if any(marker in text for marker in CAPTCHA_MARKERS):
+            return 'captcha'
+        if any(marker in text for marker in BLOCK_MARKERS):
+            return 'blocked'
+    else:
+        text = None
+    # product cards carry data-id and product links carry pid=; only pages without either can be empty
+    if b'data-id="' not in content and b'pid=' not in content:
+        text = content.lower() if text is None else text
+        if any(marker in text for marker in EMPTY_MARKERS):
+            return 'empty'
+    return 'ok'
+
+def cacheable_page(response: requests.Response) -> bool:
+    """Bot-wall and captcha pages must never be replayed from the HTTP cache"""
+    return classify_page(200, response.content) not in BLOCK_VERDICTS
+
 # ==================== CORE SCRAPER ====================
 
-class RobustFlipkartScraper:
+class RobustFlipkartScraper(ResumableOutputMixin):
     """Production-ready Flipkart scraper with anchor fallback"""
+    SCRAPER_VERSION = "2.0.0-anchor"
 
     def __init__(self, config: Optional[ScraperConfig] = None):
         self.config = config or ScraperConfig()
-        self.driver: Optional[webdriver.Chrome] = None
-        self.wait: Optional[WebDriverWait] = None
-        self.seen_ids: Set[str] = set()
+        self.browser_pool: Optional[BrowserPool] = None
+        self._pool_lock = threading.Lock()
+        self.seen_ids: Set[str] = new_seen_ids(self.config.dedup_backend, self.config.dedup_initial_capacity,
+                                               self.config.dedup_error_rate)
+        self.output: Optional[JsonlWriter] = None
+        self.summary = RunSummary()
+        self._run: Optional[Dict[str, Any]] = None  # resumable state of the current search
+        self.id_journal: Optional[IdJournal] = None
+        self.dedup_index: Optional[SeenIndex] = None
+        if self.config.dedup_index_file:
+            self.dedup_index = SeenIndex(self.config.dedup_index_file, self.config.dedup_index_mode)
+        self.rate_limiter = AdaptiveRateLimiter(
+            rate=self.config.rate_initial,
+            min_rate=self.config.rate_min,
+            max_rate=self.config.rate_max,
+            increase=self.config.rate_increase,
+            decrease=self.config.rate_decrease
+        )
         self.stats = {
             'pages_scraped': 0,
             'products_found': 0,
             'products_valid': 0,
-            'errors': 0
+            'errors': 0,
+            'products_unchanged': 0,
+            'strategies': {},
+            'requests_allowed': 0,
+            'requests_blocked': 0,
+            'pages_fetched': 0,
+            'pages_cached': 0,
+            'pages_revalidated': 0,
+            'page_verdicts': {}
         }
+        self._stats_lock = threading.Lock()
+        self.timings = StageTimings()
+        self.validators = PageValidators(self.config.revalidate_dir) if self.config.revalidate_dir else None
+        self.retry_policy = RetryPolicy(
+            max_retries=self.config.retry_attempts,
+            base_delay=self.config.retry_delay,
+            max_delay=self.config.retry_max_delay,
+            deadline=self.config.retry_deadline
+        )
 
         # Prepare a requests session for fast-path HTTP fetches
-        self.session = requests.Session()
-        self.session.headers.update({
-            "Accept-Language": "en-US,en;q=0.9",
-            "Accept-Encoding": "gzip, deflate, br",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8"
-        })
+        self.session = self._new_session()
 
-        # Initialize driver lazily — only if fallback to Selenium is needed
-        self._driver_initialized = False
+        # Drivers start lazily (via the pool) — only if fallback to Selenium is needed
         logger.info(" Scraper instance created (driver lazy-init)")
         logger.info(" Will try fast HTTP fetch first, fallback to browser when needed")
 
-    def _initialize_driver(self):
-        """Initialize stealth browser only when required"""
-        if self._driver_initialized:
-            return
-
+    def _new_session(self) -> requests.Session:
+        """requests session for the fast path; _retry_blocked also opens short-lived ones"""
+        session = requests.Session()
+        session.headers.update({
+            "Accept-Language": "en-US,en;q=0.9",
+            "Accept-Encoding": "gzip, deflate, br",
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8"
+        })
+        # size the connection pool so concurrent page fetches don't queue on it
+        if self.config.http_cache_dir:
+            cache = HttpCache(self.config.http_cache_dir, self.config.http_cache_ttl,
+                              self.config.http_cache_max_mb * 1024 * 1024)
+            adapter = CachingAdapter(cache, storable=cacheable_page, pool_maxsize=max(10, self.config.max_workers))
+        else:
+            adapter = HTTPAdapter(pool_maxsize=max(10, self.config.max_workers))
+        time_connections(adapter)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _create_driver(self) -> webdriver.Chrome:
+        """Start one stealth browser (factory for the browser pool)"""
         try:
             options = Options()
 
@@ -211,14 +844,23 @@ class RobustFlipkartScraper:
                 "profile.managed_default_content_settings.images": 2
             })
 
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=options)
-            self.wait = WebDriverWait(self.driver, self.config.timeout)
+            if self.config.block_resources or self.config.capture_api:
+                # performance log is what count_requests and _capture_page read network events from
+                options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+            service = Service(resolve_chromedriver())
+            driver = webdriver.Chrome(service=service, options=options)
+            if self.config.capture_api:
+                driver.execute_cdp_cmd('Network.enable', {})
+            if self.config.block_resources:
+                block_resources(driver, self.config.blocked_url_patterns
+                                + (['*.css'] if self.config.block_stylesheets else []))
+            driver.set_script_timeout(self.config.scroll_max_wait + self.config.timeout)
 
             # Stealth scripts
             try:
-                self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-                self.driver.execute_script("""
+                driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+                driver.execute_script("""
                     Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
                     Object.defineProperty(navigator, 'languages', {get: () => ['en-US', 'en']});
                 """)
@@ -226,89 +868,84 @@ class RobustFlipkartScraper:
                 # Not critical
                 pass
 
-            self._driver_initialized = True
             logger.info(" Stealth browser initialized (lazy)")
+            return driver
         except Exception as e:
             logger.error(f" Driver init failed: {e}")
             raise
 
-    def _random_delay(self):
-        """Random delay for anti-detection"""
-        time.sleep(random.uniform(self.config.min_delay, self.config.max_delay))
+    def _browser_pool(self) -> BrowserPool:
+        """Create the driver pool on first use (thread-safe; workers may render in parallel)"""
+        with self._pool_lock:
+            if self.browser_pool is None:
+                self.browser_pool = BrowserPool(
+                    self._create_driver,
+                    size=self.config.browser_pool_size,
+                    recycle_after=self.config.browser_recycle_after
+                )
+            return self.browser_pool
 
     @contextmanager
-    def _page_timeout(self):
+    def _page_timeout(self, driver):
         """Context manager for page timeouts"""
-        if not self.driver:
-            yield
-            return
         old_timeout = None
         try:
-            old_timeout = self.driver.timeouts.page_load
-            self.driver.set_page_load_timeout(self.config.timeout)
+            old_timeout = driver.timeouts.page_load
+            driver.set_page_load_timeout(self.config.timeout)
             yield
         finally:
-            if self.driver and old_timeout is not None:
+            if old_timeout is not None:
                 try:
-                    self.driver.set_page_load_timeout(old_timeout)
+                    driver.set_page_load_timeout(old_timeout)
                 except Exception:
                     pass
 
-    def search(self, query: str, max_pages: Optional[int] = None) -> List[Dict[str, Any]]:
+    def search(self, query: str, max_pages: Optional[int] = None) -> List[FlipkartProduct]:
         """Main search function with comprehensive error handling"""
         max_pages = max_pages or self.config.max_pages
+        if self.config.max_workers > 1:
+            return self.search_concurrent(query, max_pages)
         logger.info(f"🔍 Searching '{query}' (max {max_pages} pages)")
 
         base_url = f"https://www.flipkart.com/search?q={quote_plus(query)}&otracker=search&otracker1=search"
         all_products = []
+        done = self._resume_checkpoint(query, max_pages)
 
         try:
             for page in range(1, max_pages + 1):
+                if page in done:
+                    continue
                 logger.info(f"\n📄 Page {page}/{max_pages}")
 
                 try:
-                    # 1) Fast path: try HTTP fetch and parse
-                    page_products = self._scrape_page_requests(base_url, page)
-                    logger.debug(f"Fast-path found {len(page_products)} items")
-                    if len(page_products) >= self.config.min_products_threshold:
-                        all_products.extend(page_products)
-                    else:
-                        logger.info("⚠️ Fast-path returned few items; running anchor fallback or browser fallback")
-                        # Try anchor fallback in requests first
-                        alt_products = self._scrape_page_requests_anchor_fallback(base_url, page)
-                        if len(alt_products) >= self.config.min_products_threshold:
-                            logger.info(f"⚡ Anchor-fallback (requests) returned {len(alt_products)} items")
-                            all_products.extend(alt_products)
-                        else:
-                            # 2) Fallback: use Selenium for pages where JS rendering required
-                            logger.info(" Falling back to browser rendering for this page")
-                            page_products = self._scrape_page(base_url, page)
-                            # if selenium returns few, try selenium anchor fallback
-                            if len(page_products) < self.config.min_products_threshold:
-                                alt_products = self._scrape_page_selenium_anchor_fallback(page)
-                                logger.info(f"Selenium anchor-fallback returned {len(alt_products)}")
-                                page_products.extend([p for p in alt_products if p['product_id'] not in self.seen_ids])
-                            all_products.extend(page_products)
+                    # 1) Fast path: one HTTP fetch, container then anchor strategy on the same document
+                    doc = self._fetch_page_document(base_url, page)
+                    self._run_request_strategies(doc)
+                    self._remember_page(doc)
+                    logger.debug(f"Fast-path found {len(doc.products)} items ({doc.strategy})")
+
+                    # 2) Browser fallback only if both request strategies came up short
+                    page_products, _ = self._finish_page(base_url, doc)
+                    self._collect_products(query, page_products, all_products)
 
                     # Progress checkpoint
-                    if len(all_products) % self.config.save_interval == 0 and len(all_products) > 0:
+                    if (self.config.output_format == 'jsonl'
+                            or self.summary.count % self.config.save_interval == 0 and self.summary.count > 0):
                         self._save_checkpoint(all_products, query, page)
 
                     # Early exit detection
-                    if len(all_products) < 1 and page > 2:
+                    if self.summary.count < 1 and page > 2:
                         logger.info("⚠️ No products found on multiple pages, ending early")
                         break
 
-                    # Aim for low delays — but sleep a small amount
-                    self._random_delay()
-
                 except Exception as e:
                     logger.error(f"❌ Page {page} failed: {e}")
                     self.stats['errors'] += 1
                     continue
 
-            self.stats['products_valid'] = len(all_products)
-            logger.info(f"✅ Found {len(all_products)} unique products")
+            self._run['complete'] = True
+            self.stats['products_valid'] = self.summary.count
+            logger.info(f"✅ Found {self.summary.count} unique products")
             return all_products
 
         except KeyboardInterrupt:
@@ -318,159 +955,709 @@ class RobustFlipkartScraper:
 
         return all_products
 
+    def search_concurrent(self, query: str, max_pages: Optional[int] = None) -> List[FlipkartProduct]:
+        """
+        Concurrent search: up to config.max_workers result pages are fetched and parsed
+        over HTTP at once. Results are merged strictly in page order on the calling thread,
+        so seen_ids is only ever touched here and a product repeated across pages is kept
+        on its first page, exactly as in the sequential search. Browser fallbacks (single
+        driver) also run here, in order. Scheduling stops at the first page that had no
+        cards at all or a terminal verdict; one whose cards were all seen on earlier pages
+        does not end the search.
+        """
+        max_pages = max_pages or self.config.max_pages
+        workers = max(1, self.config.max_workers)
+        logger.info(f"🔍 Searching '{query}' (max {max_pages} pages, {workers} workers)")
+
+        base_url = f"https://www.flipkart.com/search?q={quote_plus(query)}&otracker=search&otracker1=search"
+        all_products = []
+        pending = {}
+        # pages a resumed run already finished are never scheduled
+        done = self._resume_checkpoint(query, max_pages)
+        todo = [page for page in range(1, max_pages + 1) if page not in done]
+        next_index = 0
+
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="flipkart-page")
+        try:
+            # prime the window
+            while next_index < len(todo) and len(pending) < workers:
+                pending[todo[next_index]] = executor.submit(self._fetch_page_candidates, base_url, todo[next_index])
+                next_index += 1
+
+            for page in todo:
+                future = pending.pop(page, None)
+                if future is None:
+                    break
+                logger.info(f"\n📄 Page {page}/{max_pages}")
+
+                try:
+                    page_products, exhausted = self._finish_page(base_url, future.result())
+                except Exception as e:
+                    logger.error(f"❌ Page {page} failed: {e}")
+                    self.stats['errors'] += 1
+                    page_products, exhausted = [], True
+
+                self._collect_products(query, page_products, all_products)
+
+                if exhausted:
+                    logger.info(f"⚠️ Page {page} has no more results, stopping")
+                    break
+
+                # Progress checkpoint
+                if (self.config.output_format == 'jsonl'
+                        or self.summary.count % self.config.save_interval == 0):
+                    self._save_checkpoint(all_products, query, page)
+
+                # keep the window full; the shared rate limiter paces the requests themselves
+                if next_index < len(todo):
+                    pending[todo[next_index]] = executor.submit(self._fetch_page_candidates, base_url, todo[next_index])
+                    next_index += 1
+
+            self._run['complete'] = True
+            self.stats['products_valid'] = self.summary.count
+            logger.info(f"✅ Found {self.summary.count} unique products")
+            return all_products
+
+        except KeyboardInterrupt:
+            logger.warning("⚠️ User interrupted")
+        finally:
+            for future in pending.values():
+                future.cancel()
+            executor.shutdown(wait=False)
+            self._save_checkpoint(all_products, query, "final")
+
+        return all_products
+
+    def _fetch_page_candidates(self, base_url: str, page: int) -> PageDocument:
+        """
+        Worker for search_concurrent: fetch the page once and run the request strategies.
+        With a browser pool larger than one, short pages are also rendered here, in
+        parallel with other workers (not blocked, captcha or empty ones). Never touches
+        seen_ids or stats.
+        """
+        doc = self._fetch_page_document(base_url, page)
+        self._run_request_strategies(doc)
+        self._remember_page(doc)
+        if (len(doc.products) < self.config.min_products_threshold and self.config.browser_pool_size > 1
+                and doc.verdict not in TERMINAL_VERDICTS):
+            rendered, doc.strategy = self._render_page(base_url, page)
+            doc.products = doc.products + rendered
+        return doc
+
+    def _finish_page(self, base_url: str, doc: PageDocument) -> Tuple[List[FlipkartProduct], bool]:
+        """
+        Dedupe the request-strategy result for a page and, if it is still short, run the
+        browser cascade. Blocked/captcha pages go to backoff and session rotation instead,
+        empty ones end there. Records the winning strategy on doc and in stats['strategies'].
+        Returns the new products and whether the results end here: no strategy found a
+        card (before deduplication) or the page kept a terminal verdict.
+        Call from the search thread only.
+        """
+        self._count_verdict(doc)
+        if doc.verdict in BLOCK_VERDICTS:
+            doc = self._retry_blocked(base_url, doc)
+        if doc.fetch:
+            self.stats[f'pages_{doc.fetch}'] += 1
+        found = len(doc.products)
+        page_products = self._dedupe_products(doc.products)
+        rendered = doc.strategy in ('browser', 'browser_anchor', 'browser_api')  # already rendered by a worker
+        if len(page_products) >= self.config.min_products_threshold or (rendered and page_products):
+            self.stats['pages_scraped'] += 1
+        elif doc.verdict in TERMINAL_VERDICTS:
+            logger.info(f"🚫 Page {doc.page} is {doc.verdict}; skipping the fallback strategies")
+            if page_products:
+                self.stats['pages_scraped'] += 1
+        elif not rendered:
+            logger.info("⚠️ Request strategies returned few items; falling back to browser rendering")
+            browser_products, doc.strategy = self._render_page(base_url, doc.page)
+            found += len(browser_products)
+            browser_products = self._dedupe_products(browser_products)
+            if browser_products:
+                self.stats['pages_scraped'] += 1
+            page_products.extend(browser_products)
+
+        if not found:
+            doc.strategy = 'none'
+        strategies = self.stats.setdefault('strategies', {})
+        strategies[doc.strategy] = strategies.get(doc.strategy, 0) + 1
+        logger.info(f"Page {doc.page} → {len(page_products)} items via {doc.strategy}")
+        return page_products, not found or doc.verdict in TERMINAL_VERDICTS
+
+    def _count_verdict(self, doc: PageDocument):
+        verdicts = self.stats.setdefault('page_verdicts', {})
+        verdicts[doc.verdict] = verdicts.get(doc.verdict, 0) + 1
+
+    def _retry_blocked(self, base_url: str, doc: PageDocument) -> PageDocument:
+        """
+        Back off and refetch a blocked/captcha page on a fresh session, bypassing the HTTP
+        cache. Each attempt opens its own session and closes it after the fetch; the shared
+        self.session is left alone. The rate limiter has already been cut by the blocked
+        response itself.
+        """
+        for attempt in range(self.config.block_retries):
+            delay = self.retry_policy.backoff(attempt + 1)
+            logger.warning(f"🚫 Page {doc.page} looks {doc.verdict}; retrying in {delay:.1f}s on a fresh session")
+            time.sleep(delay)
+            session = self._new_session()
+            try:
+                doc = self._fetch_page_document(base_url, doc.page, fresh=True, session=session)
+            finally:
+                session.close()
+            self._run_request_strategies(doc)
+            self._remember_page(doc)
+            self._count_verdict(doc)
+            if doc.verdict not in BLOCK_VERDICTS:
+                break
+        return doc
+
+    def _dedupe_products(self, products: List[FlipkartProduct]) -> List[FlipkartProduct]:
+        """Drop products already in seen_ids (call from the search thread only)."""
+        unique = []
+        timestamp = datetime.now().isoformat()  # one per page
+        for product in products:
+            if product.product_id not in self.seen_ids:
+                self.seen_ids.add(product.product_id)
+                product.timestamp = timestamp
+                unique.append(product)
+        return unique
+
     # ------------------ REQUESTS PATHS ------------------
 
-    def _scrape_page_requests(self, base_url: str, page: int) -> List[Dict[str, Any]]:
+    def _paced_get(self, url: str, headers: Dict[str, str], timeout: float,
+                   session: Optional[requests.Session] = None) -> requests.Response:
+        """One HTTP attempt, paced by the shared rate limiter and fed back to it (cache hits aren't)"""
+        self.rate_limiter.acquire()
+        timing_context.timings = self.timings
+        start = time.monotonic()
+        try:
+            resp = (session or self.session).get(url, headers=headers, timeout=timeout)
+        except requests.exceptions.RequestException:
+            self.rate_limiter.record(throttled=True)
+            raise
+        elapsed = time.monotonic() - start
+        if getattr(resp, 'from_cache', False):
+            self.timings.record('http.cache_hit', elapsed)
+        else:
+            # resp.elapsed stops at the response headers (and includes any new-connection setup)
+            ttfb = resp.elapsed.total_seconds()
+            self.timings.record('http.ttfb', ttfb)
+            self.timings.record('http.download', max(0.0, elapsed - ttfb))
+            self.rate_limiter.record(resp.status_code, elapsed,
+                                     classify_page(resp.status_code, resp.content) in BLOCK_VERDICTS)
+        return resp
+
+    def _fetch_page_document(self, base_url: str, page: int, fresh: bool = False,
+                             session: Optional[requests.Session] = None) -> PageDocument:
         """
-        Fast-path: fetch page HTML with requests and parse with BeautifulSoup.
-        Wrap soup elements in SoupElementWrapper so existing parsing code works unchanged.
+        Single HTTP fetch for a results page; every request strategy reuses the result.
+        Sent conditionally when validators are known for the URL: on 304 the products parsed
+        from the previous response are reused and the page is not parsed at all.
+        fresh skips both the HTTP cache and the conditional headers; session overrides
+        self.session for this one fetch.
         """
         url = f"{base_url}&page={page}" if page > 1 else base_url
         headers = {
             "User-Agent": random.choice(self.config.user_agents)
         }
+        if fresh:
+            headers["Cache-Control"] = "no-cache"
+        known = self.validators.get(url) if self.validators and not fresh else None
+        if known:
+            headers.update(PageValidators.conditional_headers(known))
         try:
-            resp = self.session.get(url, headers=headers, timeout=self.config.timeout)
+            resp = self.retry_policy.call(
+                lambda timeout: self._paced_get(url, headers, timeout, session),
+                self.config.timeout
+            )
+            if resp.status_code == 304 and known:
+                return self._revalidated_document(url, page, known)
             if resp.status_code != 200:
                 logger.debug(f"HTTP fast-path status != 200: {resp.status_code}")
-                return []
+            doc = PageDocument(url, page, resp.status_code, resp.content, resp.encoding)
+            doc.fetch = 'cached' if getattr(resp, 'from_cache', False) else 'fetched'
+            doc.etag = resp.headers.get('ETag')
+            doc.last_modified = resp.headers.get('Last-Modified')
+            return doc
+        except Exception as e:
+            logger.debug(f"Fast-path request failed: {e}")
+            return PageDocument(url, page)
+
+    def _revalidated_document(self, url: str, page: int, known: Dict[str, Any]) -> PageDocument:
+        """Document for a 304: products and strategy from the stored parse, fresh timestamps."""
+        doc = PageDocument(url, page, 304)
+        doc.fetch = 'revalidated'
+        doc.strategy = known['strategy']
+        timestamp = datetime.now().isoformat()
+        doc.products = [FlipkartProduct(**dict(p, timestamp=timestamp)) for p in known['products']]
+        logger.debug(f"♻️ Page {page} not modified, reusing {len(doc.products)} parsed products")
+        return doc
+
+    def _remember_page(self, doc: PageDocument):
+        """Store validators and the parsed products of a freshly parsed page (worker-safe)."""
+        if (self.validators and doc.fetch in ('fetched', 'cached')
+                and len(doc.products) >= self.config.min_products_threshold):
+            self.validators.put(doc.url, doc.etag, doc.last_modified, doc.strategy,
+                                [p.to_dict() for p in doc.products])
+
+    def _run_request_strategies(self, doc: PageDocument) -> PageDocument:
+        """
+        Fast path over one document: embedded page-state JSON first, then container
+        selectors, then the anchor strategy if they find too few cards.
+        Sets doc.products and doc.strategy (no deduplication).
+        """
+        if doc.fetch == 'revalidated':
+            return doc
+        if doc.verdict != 'ok':
+            doc.strategy = 'none'
+            return doc
+
+        if self.config.use_page_state:
+            with self.timings.time('parse.state'):
+                doc.products = self._parse_state_strategy(doc)
+            doc.strategy = 'state'
+            if len(doc.products) >= self.config.min_products_threshold:
+                return doc
+
+        with self.timings.time('parse.html'):
+            try:
+                doc.parse(self.config.parser_backend)
+            except Exception:
+                pass  # the strategies report the same failure as an empty page
+        with self.timings.time('parse.container'):
+            doc.products = self._parse_container_strategy(doc)
+        doc.strategy = 'container'
+        if len(doc.products) < self.config.min_products_threshold:
+            with self.timings.time('fallback.anchor'):
+                alt_products = self._parse_anchor_strategy(doc)
+            if len(alt_products) > len(doc.products):
+                logger.info(f"⚡ Anchor-fallback (requests) returned {len(alt_products)} items")
+                doc.products = alt_products
+                doc.strategy = 'anchor'
+        return doc
+
+    def _parse_state_strategy(self, doc: PageDocument) -> List[FlipkartProduct]:
+        """
+        State strategy: map the embedded page-state JSON straight onto FlipkartProduct.
+        No DOM is built; returns [] when the page has no usable state blob.
+        """
+        state = extract_page_state(doc.content)
+        if not state:
+            return []
+        return self._products_from_state(state, doc.page)
 
-            soup = BeautifulSoup(resp.text, "lxml")
+    def _products_from_state(self, state: Dict[str, Any], page: int) -> List[FlipkartProduct]:
+        """Valid products from page-state JSON (also the shape of the rome.api page-fetch responses)."""
+        products = []
+        timestamp = datetime.now().isoformat()
+        for value in iter_state_products(state):
+            try:
+                price = int(state_get(value, 'pricing', 'finalPrice', 'value') or 0)
+                original_price = int(state_get(value, 'pricing', 'mrp', 'value') or 0) or price
+
+                rating = state_get(value, 'rating', 'average')
+                rating_count = state_get(value, 'rating', 'count')
+
+                product_url = value.get('baseUrl') or value.get('smartUrl') or ""
+                if product_url.startswith('/'):
+                    product_url = f"https://www.flipkart.com{product_url}"
+
+                images = state_get(value, 'media', 'images') or []
+                thumbnail = ""
+                if images and isinstance(images[0], dict):
+                    thumbnail = (images[0].get('url') or "").replace('{@width}', '400') \
+                        .replace('{@height}', '400').replace('{@quality}', '70')
+
+                product = FlipkartProduct(
+                    title=state_get(value, 'titles', 'title') or "",
+                    product_id=value.get('id') or "",
+                    brand=value.get('productBrand') or state_get(value, 'titles', 'superTitle') or "",
+                    price=price,
+                    original_price=original_price,
+                    discount=self._calculate_discount(price, original_price),
+                    rating=float(rating or 0.0),
+                    rating_count=int(rating_count or 0),
+                    product_url=product_url,
+                    in_stock=state_get(value, 'availability', 'displayState') != 'OUT_OF_STOCK',
+                    thumbnail=thumbnail,
+                    page_number=page,
+                    timestamp=timestamp
+                )
+                if product.is_valid():
+                    products.append(product)
+            except Exception:
+                continue
+        return products
 
-            # Find product nodes using the combined container selector
+    def _parse_container_strategy(self, doc: PageDocument) -> List[FlipkartProduct]:
+        """
+        Container strategy: select product cards with the combined container selector.
+        Soup elements are wrapped in SoupElementWrapper so existing parsing code works unchanged.
+        """
+        if self.config.parser_backend == 'lxml':
+            return self._parse_container_lxml(doc)
+        try:
+            raw_nodes = doc.soup.select(self.config.selectors['product_container'])
+        except Exception:
             raw_nodes = []
+
+        products = []
+        for n in raw_nodes:
             try:
-                raw_nodes = soup.select(self.config.selectors['product_container'])
+                wrapped = SoupElementWrapper(n)
+                product = self._parse_product(wrapped, doc.page)
+                if product and product.is_valid():
+                    products.append(product)
             except Exception:
-                raw_nodes = []
+                continue
+        return products
 
-            products = []
-            for n in raw_nodes:
-                try:
-                    wrapped = SoupElementWrapper(n)
-                    product = self._parse_product(wrapped, page)
-                    if product and product.is_valid():
-                        if product.product_id not in self.seen_ids:
-                            self.seen_ids.add(product.product_id)
-                            products.append(product.to_dict())
-                except Exception:
+    def _parse_anchor_strategy(self, doc: PageDocument) -> List[FlipkartProduct]:
+        """
+        Anchor strategy: find product anchor links and climb ancestors to locate the product card.
+        This helps capture electronics / mobiles / appliances which use different containers.
+        """
+        if self.config.parser_backend == 'lxml':
+            return self._parse_anchor_lxml(doc)
+        try:
+            anchors = doc.soup.select('a[href*="/p/"], a[href*="pid="], a._1fQZEK, a.s1Q9rs')
+        except Exception as e:
+            logger.debug(f"Anchor fallback (requests) failed: {e}")
+            return []
+
+        # selector lists joined once so select_one gets a single selector group
+        probe = ', '.join(
+            self.config.selectors['current_price'] + self.config.selectors['image'] + self.config.selectors['title']
+        )
+
+        products = []
+        seen_hrefs = set()
+        for a in anchors:
+            try:
+                href = a.get('href') or ""
+                # normalize absolute
+                if href.startswith('/'):
+                    href_norm = f"https://www.flipkart.com{href}"
+                else:
+                    href_norm = href
+                if not href_norm:
+                    continue
+                # dedupe by href
+                if href_norm in seen_hrefs:
                     continue
+                seen_hrefs.add(href_norm)
+
+                # climb ancestors up to depth 4 to find a node that has price or image
+                candidate = None
+                node = a
+                for _ in range(5):
+                    # node may be the anchor or parent
+                    if node is None:
+                        break
+                    # check for price / image / title inside this ancestor
+                    if node.select_one(probe):
+                        candidate = node
+                        break
+                    node = node.parent
 
-            # set stats
-            if products:
-                self.stats['pages_scraped'] += 1
-                logger.debug(f"Fast-path parsed {len(products)} products (page {page})")
-            return products
+                # fallback: use anchor's parent chain even if no price found
+                if candidate is None:
+                    candidate = a.parent or a
+
+                wrapped = SoupElementWrapper(candidate)
+                # ensure product_url is visible by adding href attribute to candidate if missing
+                if not wrapped.get_attribute('href'):
+                    # attach href on the wrapper's element (not modifying actual DOM but provide via a helper)
+                    # workaround: the SoupElementWrapper will consult the element for href; set a temporary attr
+                    try:
+                        candidate['href'] = href_norm
+                    except Exception:
+                        pass
+
+                product = self._parse_product(wrapped, doc.page)
+                # ensure product_url if empty, set it from anchor
+                if product:
+                    if not product.product_url and href_norm:
+                        product.product_url = href_norm
+                    if product.is_valid():
+                        products.append(product)
+            except Exception:
+                continue
+
+        return products
+
+    # ------------------ LXML BACKEND PATHS ------------------
 
+    def _parse_container_lxml(self, doc: PageDocument) -> List[FlipkartProduct]:
+        """Container strategy on the lxml tree (parser_backend='lxml')."""
+        backend = self.config.lxml_backend()
+        try:
+            cards = backend.container(doc.tree)
+        except Exception:
+            cards = []
+
+        products = []
+        for card in cards:
+            product = self._parse_lxml_card(card, doc.page)
+            if product and product.is_valid():
+                products.append(product)
+        return products
+
+    def _parse_anchor_lxml(self, doc: PageDocument) -> List[FlipkartProduct]:
+        """Anchor strategy on the lxml tree; mirrors _parse_anchor_strategy step for step."""
+        backend = self.config.lxml_backend()
+        try:
+            anchors = backend.anchors(doc.tree)
         except Exception as e:
-            logger.debug(f"Fast-path request failed: {e}")
+            logger.debug(f"Anchor fallback (lxml) failed: {e}")
             return []
 
-    def _scrape_page_requests_anchor_fallback(self, base_url: str, page: int) -> List[Dict[str, Any]]:
-        """
-        Anchor-based fallback for requests/soup:
-        Find product anchor links and climb ancestors to locate the product card.
-        This helps capture electronics / mobiles / appliances which use different containers.
-        """
-        url = f"{base_url}&page={page}" if page > 1 else base_url
-        headers = {"User-Agent": random.choice(self.config.user_agents)}
+        products = []
+        seen_hrefs = set()
+        for a in anchors:
+            try:
+                href = a.get('href') or ""
+                href_norm = f"https://www.flipkart.com{href}" if href.startswith('/') else href
+                if not href_norm or href_norm in seen_hrefs:
+                    continue
+                seen_hrefs.add(href_norm)
+
+                # climb up to 5 levels to the first node holding a price / image / title
+                candidate = None
+                node = a
+                for _ in range(5):
+                    if node is None:
+                        break
+                    if backend.probe is not None and backend.probe(node):
+                        candidate = node
+                        break
+                    node = node.getparent()
+                if candidate is None:
+                    candidate = a.getparent() if a.getparent() is not None else a
+
+                if not candidate.get('href'):
+                    candidate.set('href', href_norm)
+
+                product = self._parse_lxml_card(candidate, doc.page)
+                if product:
+                    if not product.product_url and href_norm:
+                        product.product_url = href_norm
+                    if product.is_valid():
+                        products.append(product)
+            except Exception:
+                continue
+        return products
+
+    def _parse_lxml_card(self, card, page_num: int) -> Optional[FlipkartProduct]:
+        """Same fields and fallbacks as _parse_product, evaluated directly on an lxml element."""
+        backend = self.config.lxml_backend()
+        timings = self.timings
+
+        def pick(field, getter):
+            start = time.perf_counter()
+            value = backend.pick(field, card, getter)
+            timings.record('field.' + field, time.perf_counter() - start)
+            return value
+
         try:
-            resp = self.session.get(url, headers=headers, timeout=self.config.timeout)
-            if resp.status_code != 200:
-                return []
+            # Product ID
+            product_id = card.get("data-id") or card.get("data-pid") or card.get("data-product-id")
+            if not product_id:
+                link = backend.first(backend.id_link, card)
+                href = (link.get('href') or "") if link is not None else ""
+                if href:
+                    qs = parse_qs(urlparse(href).query)
+                    pid = qs.get('pid') or qs.get('product_id') or qs.get('p')
+                    product_id = pid[0] if pid else stable_id('href', href)
+            if not product_id:
+                anchor = backend.first(backend.anchor, card)
+                if anchor is None:
+                    return None
+                product_id = stable_id('pid', _lxml_text(anchor))
 
-            soup = BeautifulSoup(resp.text, "lxml")
-            anchors = soup.select('a[href*="/p/"], a[href*="pid="], a._1fQZEK, a.s1Q9rs')
-            products = []
+            # Title (critical field)
+            title = pick('title', _lxml_title_or_text)
+            if not title:
+                anchor = backend.first(backend.anchor, card)
+                title = _lxml_text(anchor) if anchor is not None else ""
+            if not title:
+                return None
 
-            seen_hrefs = set()
-            for a in anchors:
-                try:
-                    href = a.get('href') or ""
-                    # normalize absolute
-                    if href.startswith('/'):
-                        href_norm = f"https://www.flipkart.com{href}"
-                    else:
-                        href_norm = href
-                    if not href_norm:
-                        continue
-                    # dedupe by href
-                    if href_norm in seen_hrefs:
-                        continue
-                    seen_hrefs.add(href_norm)
+            brand = pick('brand', _lxml_title_or_text) or ""
+            current_price = pick('current_price', _lxml_price) or 0
+            original_price = pick('original_price', _lxml_price) or current_price
+            with timings.time('field.out_of_stock'):
+                in_stock = not backend.exists('out_of_stock', card)
 
-                    # climb ancestors up to depth 4 to find a node that has price or image
-                    candidate = None
-                    node = a
-                    for _ in range(5):
-                        # node may be the anchor or parent
-                        if node is None:
-                            break
-                        # check for price / image / title inside this ancestor
-                        if node.select_one(self.config.selectors['current_price']) or node.select_one(self.config.selectors['image']) or node.select_one(self.config.selectors['title']):
-                            candidate = node
-                            break
-                        node = node.parent
-
-                    # fallback: use anchor's parent chain even if no price found
-                    if candidate is None:
-                        candidate = a.parent or a
+            # URL
+            product_url = ""
+            with timings.time('field.link'):
+                link = backend.first(backend.link, card)
+            href = (link.get('href') or "") if link is not None else ""
+            if href:
+                product_url = f"https://www.flipkart.com{href}" if href.startswith('/') else href
+            else:
+                href_attr = card.get("href") or ""
+                if href_attr:
+                    product_url = href_attr if href_attr.startswith("http") else f"https://www.flipkart.com{href_attr}"
 
-                    wrapped = SoupElementWrapper(candidate)
-                    # ensure product_url is visible by adding href attribute to candidate if missing
-                    if not wrapped.get_attribute('href'):
-                        # attach href on the wrapper's element (not modifying actual DOM but provide via a helper)
-                        # workaround: the SoupElementWrapper will consult the element for href; set a temporary attr
-                        try:
-                            candidate['href'] = href_norm
-                        except Exception:
-                            pass
+            # Rating
+            rating = 0.0
+            rating_text = pick('rating', _lxml_title_or_text)
+            try:
+                if rating_text:
+                    rating = float(rating_text.split()[0])
+            except Exception:
+                pass
+            count_digits = re.sub(r'[^\d]', '', pick('rating_count', _lxml_title_or_text) or "")
+            rating_count = int(count_digits) if count_digits else 0
 
-                    product = self._parse_product(wrapped, page)
-                    # ensure product_url if empty, set it from anchor
-                    if product:
-                        if not product.product_url and href_norm:
-                            product.product_url = href_norm
-                        if product.is_valid() and product.product_id not in self.seen_ids:
-                            self.seen_ids.add(product.product_id)
-                            products.append(product.to_dict())
-                except Exception:
-                    continue
+            # Image
+            src = pick('image', lambda n: n.get("src") or n.get("data-src"))
+            thumbnail = src.replace("200/200", "400/400") if src else ""
 
-            if products:
-                self.stats['pages_scraped'] += 1
-            return products
+            return FlipkartProduct(
+                title=title,
+                product_id=product_id,
+                brand=brand,
+                price=current_price,
+                original_price=original_price,
+                discount=self._calculate_discount(current_price, original_price),
+                rating=rating,
+                rating_count=rating_count,
+                product_url=product_url,
+                in_stock=in_stock,
+                thumbnail=thumbnail,
+                page_number=page_num
+            )
 
         except Exception as e:
-            logger.debug(f"Anchor fallback (requests) failed: {e}")
-            return []
+            logger.debug(f"Product parse failed: {e}")
+            return None
 
     # ------------------ SELENIUM PATHS ------------------
 
-    def _scrape_page(self, base_url: str, page: int) -> List[Dict[str, Any]]:
-        """Original Selenium page scraping preserved (lazy driver init)."""
+    def _render_page(self, base_url: str, page: int) -> tuple[List[FlipkartProduct], str]:
+        """
+        Browser fallback for one page on a pooled driver: page-JSON capture (if enabled), then
+        container extraction, then the selenium anchor fallback if that finds too few. Returns (products, strategy) without
+        deduplication, so it is safe to call from worker threads.
+        """
         url = f"{base_url}&page={page}" if page > 1 else base_url
-
+        start = time.perf_counter()
         try:
-            self._initialize_driver()
+            with self._browser_pool().acquire() as driver:
+                self.rate_limiter.acquire()
+                loaded = False
+                entries: List[Dict[str, Any]] = []
+                if self.config.capture_api:
+                    try:
+                        with self.timings.time('browser.capture'):
+                            products, entries = self._capture_page(driver, url, page)
+                        loaded = True
+                        if len(products) >= self.config.min_products_threshold:
+                            logger.info(f"📦 Captured {len(products)} products from page JSON (browser)")
+                            self._record_requests(driver, entries)
+                            self.rate_limiter.record()
+                            return products, 'browser_api'
+                    except Exception as e:
+                        logger.debug(f"API capture failed on page {page}: {e}")
+
+                products = self._scrape_page(driver, url, page, loaded=loaded)
+                strategy = 'browser'
+                # if selenium returns few, try selenium anchor fallback
+                if len(products) < self.config.min_products_threshold:
+                    with self.timings.time('fallback.browser_anchor'):
+                        alt_products = self._scrape_page_selenium_anchor_fallback(driver, page)
+                    logger.info(f"Selenium anchor-fallback returned {len(alt_products)}")
+                    if alt_products:
+                        strategy = 'browser_anchor'
+                    products = products + alt_products
+                self._record_requests(driver, entries)
+                self.rate_limiter.record(throttled=not products)
+                return products, strategy
+        except Exception as e:
+            logger.error(f"❌ Page {page} browser render failed: {e}")
+            return [], 'browser'
+        finally:
+            self.timings.record('fallback.browser', time.perf_counter() - start)
 
-            with self._page_timeout():
-                self.driver.get(url)
+    def _capture_page(self, driver, url: str, page: int) -> tuple[List[FlipkartProduct], List[Dict[str, Any]]]:
+        """
+        Network-capture render: navigate, then map the page's own JSON onto products instead of
+        parsing the DOM. The hydration state is read first; if it holds too few products, the
+        rome.api page-fetch responses are taken from CDP as soon as each finishes loading, for
+        as long as one is in flight. No scroll. Returns (products, performance-log entries consumed).
+        """
+        with self._page_timeout(driver), self.timings.time('browser.load'):
+            driver.get(url)
+
+        state = driver.execute_script("return window.__INITIAL_STATE__ || null")
+        products = self._products_from_state(state, page) if isinstance(state, dict) else []
+
+        pattern = re.compile(self.config.api_capture_pattern)
+        entries: List[Dict[str, Any]] = []
+        in_flight: Set[str] = set()  # page-fetch requests sent but not finished loading
+        deadline = time.monotonic() + self.config.api_capture_timeout
+        while len(products) < self.config.min_products_threshold:
+            batch = read_network_log(driver)
+            entries.extend(batch)
+            for entry in batch:
+                message = entry.get('message', '')
+                if '"Network.requestWillBeSent"' in message and pattern.search(message):
+                    params = json.loads(message)['message']['params']
+                    if pattern.search(params['request']['url']):
+                        in_flight.add(params['requestId'])
+                elif in_flight and '"Network.loadingFailed"' in message:
+                    in_flight.discard(json.loads(message)['message']['params']['requestId'])
+                elif in_flight and '"Network.loadingFinished"' in message:
+                    request_id = json.loads(message)['message']['params']['requestId']
+                    if request_id in in_flight:
+                        in_flight.discard(request_id)
+                        body = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+                        text = body['body']
+                        if body.get('base64Encoded'):
+                            text = base64.b64decode(text).decode('utf-8', errors='replace')
+                        try:
+                            products.extend(self._products_from_state(json.loads(text), page))
+                        except ValueError:
+                            continue
+            # driver.get returns after the load event: with no page-fetch in flight none is coming
+            if not in_flight or time.monotonic() >= deadline:
+                break
+            time.sleep(0.05)
+        return products, entries
+
+    def _record_requests(self, driver, entries: List[Dict[str, Any]] = ()):
+        """Add the page's allowed/blocked browser request counts to stats (called from render threads)"""
+        if self.config.block_resources or self.config.capture_api:
+            allowed, blocked = count_requests(list(entries) + read_network_log(driver))
+            with self._stats_lock:
+                self.stats['requests_allowed'] += allowed
+                self.stats['requests_blocked'] += blocked
+
+    def _scrape_page(self, driver, url: str, page: int, loaded: bool = False) -> List[FlipkartProduct]:
+        """Original Selenium page scraping preserved (driver borrowed from the pool)."""
+        try:
+            if not loaded:
+                with self._page_timeout(driver), self.timings.time('browser.load'):
+                    driver.get(url)
 
             # Wait for products to load (original behavior)
-            self.wait.until(
-                EC.presence_of_all_elements_located(
-                    (By.CSS_SELECTOR, self.config.selectors['product_container'])
+            with self.timings.time('browser.wait'):
+                WebDriverWait(driver, self.config.timeout).until(
+                    EC.presence_of_all_elements_located(
+                        (By.CSS_SELECTOR, self.config.selectors['product_container'])
+                    )
                 )
-            )
 
             # Smart scroll to load all products
-            self._smart_scroll()
+            with self.timings.time('browser.scroll'):
+                self._smart_scroll(driver)
             logger.info(f"page scrapping: {page}")
             # Extract products
-            products = self._extract_products(page)
+            with self.timings.time('browser.extract'):
+                products = self._extract_products(driver, page)
 
-            self.stats['pages_scraped'] += 1
             logger.info(f"📦 Extracted {len(products)} products (browser)")
             return products
 
@@ -481,16 +1668,18 @@ class RobustFlipkartScraper:
             logger.error(f"❌ Page {page} error: {e}")
             return []
 
-    def _scrape_page_selenium_anchor_fallback(self, page: int) -> List[Dict[str, Any]]:
+    def _scrape_page_selenium_anchor_fallback(self, driver, page: int) -> List[FlipkartProduct]:
         """
         Selenium anchor-based fallback: find anchors and climb DOM ancestors to find product cards.
         This is more robust for mobiles / laptops / TVs / appliances.
         """
+        if self.config.in_page_extraction:
+            try:
+                return self._extract_products_in_page(driver, page, anchor_mode=True)
+            except Exception as e:
+                logger.debug(f"In-page anchor extraction failed, walking anchors: {e}")
         try:
-            if not self._driver_initialized:
-                return []
-
-            anchors = self.driver.find_elements(By.CSS_SELECTOR, 'a[href*="/p/"], a[href*="pid="], a._1fQZEK, a.s1Q9rs')
+            anchors = driver.find_elements(By.CSS_SELECTOR, 'a[href*="/p/"], a[href*="pid="], a._1fQZEK, a.s1Q9rs')
             products = []
             href_seen = set()
 
@@ -532,9 +1721,8 @@ class RobustFlipkartScraper:
                     if product:
                         if not product.product_url and href:
                             product.product_url = href
-                        if product.is_valid() and product.product_id not in self.seen_ids:
-                            self.seen_ids.add(product.product_id)
-                            products.append(product.to_dict())
+                        if product.is_valid():
+                            products.append(product)
 
                 except StaleElementReferenceException:
                     continue
@@ -547,30 +1735,48 @@ class RobustFlipkartScraper:
             logger.debug(f"Selenium anchor fallback failed: {e}")
             return []
 
-    def _smart_scroll(self):
+    def _smart_scroll(self, driver):
+        """Scroll until the product count stops growing (event-driven, capped)."""
+        try:
+            result = driver.execute_async_script(SCROLL_UNTIL_SETTLED_JS, {
+                'container': self.config.selectors['product_container'],
+                'loader': 'div._2bnFzA',
+                'quiet_ms': self.config.scroll_quiet_ms,
+                'max_ms': int(self.config.scroll_max_wait * 1000)
+            })
+            logger.debug(f"📜 Scroll {result['reason']} after {result['ms']}ms ({result['products']} cards)")
+        except Exception as e:
+            logger.debug(f"Event-driven scroll failed, using fixed sleeps: {e}")
+            self._fixed_scroll(driver)
+
+    def _fixed_scroll(self, driver):
         """Dynamic scroll detection (preserved)."""
-        if not self.driver:
-            return
-        last_height = self.driver.execute_script("return document.body.scrollHeight")
+        last_height = driver.execute_script("return document.body.scrollHeight")
         scroll_attempts = 0
 
         while scroll_attempts < 4:
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
             time.sleep(0.5)
 
-            new_height = self.driver.execute_script("return document.body.scrollHeight")
+            new_height = driver.execute_script("return document.body.scrollHeight")
             if new_height == last_height:
                 # Check if loading indicator exists
-                if not self.driver.find_elements(By.CSS_SELECTOR, "div._2bnFzA"):
+                if not driver.find_elements(By.CSS_SELECTOR, "div._2bnFzA"):
                     break
 
             last_height = new_height
             scroll_attempts += 1
 
-    def _extract_products(self, page_num: int) -> List[Dict[str, Any]]:
-        """Extract with deduplication (preserved logic)."""
+    def _extract_products(self, driver, page_num: int) -> List[FlipkartProduct]:
+        """Extract valid products (deduplication happens when the page is merged)."""
+        if self.config.in_page_extraction:
+            try:
+                return self._extract_products_in_page(driver, page_num)
+            except Exception as e:
+                logger.debug(f"In-page extraction failed, parsing per element: {e}")
+
         products = []
-        elements = self.driver.find_elements(
+        elements = driver.find_elements(
             By.CSS_SELECTOR, self.config.selectors['product_container']
         )
 
@@ -578,9 +1784,7 @@ class RobustFlipkartScraper:
             try:
                 product = self._parse_product(element, page_num)
                 if product and product.is_valid():
-                    if product.product_id not in self.seen_ids:
-                        self.seen_ids.add(product.product_id)
-                        products.append(product.to_dict())
+                    products.append(product)
             except StaleElementReferenceException:
                 continue  # Skip stale elements
             except Exception as e:
@@ -589,8 +1793,71 @@ class RobustFlipkartScraper:
 
         return products
 
+    def _extract_products_in_page(self, driver, page_num: int, anchor_mode: bool = False) -> List[FlipkartProduct]:
+        """Valid products from a single execute_script round-trip (no deduplication)."""
+        products = []
+        for raw in driver.execute_script(EXTRACT_CARDS_JS, self.config.selectors, anchor_mode):
+            product = self._product_from_raw(raw, page_num)
+            if product and product.is_valid():
+                products.append(product)
+        return products
+
+    def _product_from_raw(self, raw: Dict[str, Any], page_num: int) -> Optional[FlipkartProduct]:
+        """Build a product from the raw strings returned by EXTRACT_CARDS_JS (same rules as _parse_product)."""
+        product_id = raw.get('id')
+        id_href = raw.get('id_href')
+        if not product_id and id_href:
+            qs = parse_qs(urlparse(id_href).query)
+            pid = qs.get('pid') or qs.get('product_id') or qs.get('p')
+            product_id = pid[0] if pid else stable_id('href', id_href)
+        if not product_id:
+            # Fallback: generate from title hash
+            if raw.get('anchor_text') is None:
+                return None
+            product_id = stable_id('pid', raw['anchor_text'])
+
+        title = raw.get('title') or raw.get('anchor_text') or ''
+        if not title:
+            return None
+
+        current_price = int(re.sub(r'[^\d]', '', raw.get('price', '')) or 0)
+        original_price = int(re.sub(r'[^\d]', '', raw.get('original_price', '')) or 0) or current_price
+
+        try:
+            rating = float(raw['rating'].split()[0]) if raw.get('rating') else 0.0
+        except ValueError:
+            rating = 0.0
+        rating_count = int(re.sub(r'[^\d]', '', raw.get('rating_count', '')) or 0)
+
+        href = raw.get('link') or ''
+        own_href = raw.get('own_href') or ''
+        if href:
+            product_url = f"https://www.flipkart.com{href}" if href.startswith('/') else href
+        elif own_href:
+            product_url = own_href if own_href.startswith("http") else f"https://www.flipkart.com{own_href}"
+        else:
+            # anchor mode: the product link the card was found from
+            product_url = raw.get('anchor_href') or ''
+
+        return FlipkartProduct(
+            title=title,
+            product_id=product_id,
+            brand=raw.get('brand', ''),
+            price=current_price,
+            original_price=original_price,
+            discount=self._calculate_discount(current_price, original_price),
+            rating=rating,
+            rating_count=rating_count,
+            product_url=product_url,
+            in_stock=not raw.get('out_of_stock'),
+            thumbnail=(raw.get('image') or '').replace("200/200", "400/400"),
+            page_number=page_num
+        )
+
     def _parse_product(self, element, page_num: int) -> Optional[FlipkartProduct]:
         """Parse product with intelligent fallbacks (kept original logic + small enhancements)."""
+        if self.config.use_selector_plan and isinstance(element, SoupElementWrapper):
+            return self._parse_soup_card(element.e, page_num)
         try:
             # Product ID
             product_id = element.get_attribute("data-id") or element.get_attribute("data-pid") or element.get_attribute("data-product-id")
@@ -613,18 +1880,20 @@ class RobustFlipkartScraper:
                         product_id = pid[0]
                     else:
                         # fallback: hash of href
-                        product_id = f"href_{abs(hash(href)) % 1000000}"
+                        product_id = stable_id('href', href)
 
             if not product_id:
                 # Fallback: generate from title hash
                 title_elem = element.find_elements(By.CSS_SELECTOR, "a")
                 if title_elem:
-                    product_id = f"pid_{abs(hash(title_elem[0].text)) % 100000}"
+                    product_id = stable_id('pid', title_elem[0].text)
                 else:
                     return None
 
+            timings = self.timings
             # Title (critical field)
-            title = self._get_text_with_fallbacks(element, self.config.selectors['title'])
+            with timings.time('field.title'):
+                title = self._get_text_with_fallbacks(element, self.config.selectors['title'])
             if not title:
                 # fallback: look for generic anchor text
                 try:
@@ -637,28 +1906,36 @@ class RobustFlipkartScraper:
                 return None
 
             # Brand
-            brand = self._get_text_with_fallbacks(element, self.config.selectors['brand'])
+            with timings.time('field.brand'):
+                brand = self._get_text_with_fallbacks(element, self.config.selectors['brand'])
 
             # Prices
-            current_price = self._get_price_with_fallbacks(element, self.config.selectors['current_price'])
-            original_price = self._get_price_with_fallbacks(element, self.config.selectors['original_price']) or current_price
+            with timings.time('field.current_price'):
+                current_price = self._get_price_with_fallbacks(element, self.config.selectors['current_price'])
+            with timings.time('field.original_price'):
+                original_price = self._get_price_with_fallbacks(element, self.config.selectors['original_price']) or current_price
 
             # Stock status
-            try:
-                out_sel = ','.join(self.config.selectors['out_of_stock'])
-                in_stock = len(element.find_elements(By.CSS_SELECTOR, out_sel)) == 0
-            except Exception:
-                in_stock = True
+            with timings.time('field.out_of_stock'):
+                try:
+                    out_sel = ','.join(self.config.selectors['out_of_stock'])
+                    in_stock = len(element.find_elements(By.CSS_SELECTOR, out_sel)) == 0
+                except Exception:
+                    in_stock = True
 
             # URL
-            product_url = self._get_product_url(element)
+            with timings.time('field.link'):
+                product_url = self._get_product_url(element)
 
             # Rating
-            rating = self._extract_rating(element)
-            rating_count = self._extract_rating_count(element)
+            with timings.time('field.rating'):
+                rating = self._extract_rating(element)
+            with timings.time('field.rating_count'):
+                rating_count = self._extract_rating_count(element)
 
             # Image
-            thumbnail = self._get_image_url(element)
+            with timings.time('field.image'):
+                thumbnail = self._get_image_url(element)
 
             # Calculate discount
             discount = self._calculate_discount(current_price, original_price)
@@ -675,8 +1952,117 @@ class RobustFlipkartScraper:
                 product_url=product_url,
                 in_stock=in_stock,
                 thumbnail=thumbnail,
-                page_number=page_num,
-                timestamp=datetime.now().isoformat()
+                page_number=page_num
+            )
+
+        except Exception as e:
+            logger.debug(f"Product parse failed: {e}")
+            return None
+
+    def _parse_soup_card(self, card, page_num: int) -> Optional[FlipkartProduct]:
+        """
+        Same fields and fallbacks as _parse_product, but for a BeautifulSoup card via the
+        compiled SelectorPlan: one walk over the card instead of a select() per selector.
+        """
+        plan = self.config.selector_plan()
+        timings = self.timings
+        try:
+            with timings.time('parse.match'):
+                hits = plan.match(card)
+            exhaustive = False
+
+            def pick(field, getter):
+                # try variants in learned order; re-walk exhaustively if the winner came up empty
+                nonlocal hits, exhaustive
+                start = time.perf_counter()
+                try:
+                    while True:
+                        for idx in plan.ranked(field):
+                            node = hits[field].get(idx)
+                            if node is None:
+                                continue
+                            value = getter(node)
+                            if value:
+                                plan.record(field, idx)
+                                return value
+                        if exhaustive:
+                            return None
+                        hits, exhaustive = plan.match(card, exhaustive=True), True
+                finally:
+                    timings.record('field.' + field, time.perf_counter() - start)
+
+            def first(field):
+                nodes = hits[field]
+                return nodes[min(nodes)] if nodes else None
+
+            # Product ID
+            product_id = card.get("data-id") or card.get("data-pid") or card.get("data-product-id")
+            if not product_id:
+                link = first('id_link')
+                href = (link.get('href') or "") if link is not None else ""
+                if href:
+                    qs = parse_qs(urlparse(href).query)
+                    pid = qs.get('pid') or qs.get('product_id') or qs.get('p')
+                    product_id = pid[0] if pid else stable_id('href', href)
+            if not product_id:
+                anchor = first('anchor')
+                if anchor is None:
+                    return None
+                product_id = stable_id('pid', _soup_text(anchor))
+
+            # Title (critical field)
+            title = pick('title', _soup_title_or_text)
+            if not title:
+                anchor = first('anchor')
+                title = _soup_text(anchor) if anchor is not None else ""
+            if not title:
+                return None
+
+            brand = pick('brand', _soup_title_or_text) or ""
+            current_price = pick('current_price', _soup_price) or 0
+            original_price = pick('original_price', _soup_price) or current_price
+            in_stock = not hits['out_of_stock']
+
+            # URL
+            product_url = ""
+            link = first('link')
+            href = (link.get('href') or "") if link is not None else ""
+            if href:
+                product_url = f"https://www.flipkart.com{href}" if href.startswith('/') else href
+            else:
+                href_attr = card.get("href") or ""
+                if href_attr:
+                    product_url = href_attr if href_attr.startswith("http") else f"https://www.flipkart.com{href_attr}"
+
+            # Rating
+            rating = 0.0
+            rating_text = pick('rating', _soup_title_or_text)
+            try:
+                if rating_text:
+                    rating = float(rating_text.split()[0])
+            except Exception:
+                pass
+            count_digits = re.sub(r'[^\d]', '', pick('rating_count', _soup_title_or_text) or "")
+            rating_count = int(count_digits) if count_digits else 0
+
+            # Image
+            src = pick('image', lambda n: n.get("src") or n.get("data-src"))
+            thumbnail = src.replace("200/200", "400/400") if src else ""
+
+            plan.card_done()
+            return FlipkartProduct(
+                title=title,
+                product_id=product_id,
+                brand=brand,
+                price=current_price,
+                original_price=original_price,
+                discount=self._calculate_discount(current_price, original_price),
+                rating=rating,
+                rating_count=rating_count,
+                product_url=product_url,
+                in_stock=in_stock,
+                thumbnail=thumbnail,
+                page_number=page_num
             )
 
         except Exception as e:
@@ -774,9 +2160,28 @@ class RobustFlipkartScraper:
             return int(((original - price) / original) * 100)
         return 0
 
+    def _stream_products(self, query: str, products: List[Dict]):
+        with self.timings.time('save.stream'):
+            super()._stream_products(query, products)
+
+    def _output_metadata(self, output: JsonlWriter, query: str) -> Dict[str, Any]:
+        return dict(super()._output_metadata(output, query), timings=self.timings.summary())
+
     def _save_checkpoint(self, products: List[Dict], query: str, page: Any):
         """Save progress (preserved)."""
+        start = time.perf_counter()
         try:
+            if self.config.output_format == 'jsonl':
+                # products are already on disk line by line; the checkpoint makes them durable
+                # and records what a --resume run needs to skip done pages and known products
+                if self._run is None:
+                    return
+                if isinstance(page, int):
+                    self._run['pages'].append(page)
+                self._write_resume_state()
+                logger.debug(f"Checkpoint saved: {self.config.checkpoint_file} (page {page})")
+                return
+
             safe_query = re.sub(r'[^\w]', '_', query)
             filename = f"checkpoint_{safe_query}_p{page}_{int(time.time())}.json"
 
@@ -789,37 +2194,46 @@ class RobustFlipkartScraper:
             }
 
             Path(filename).write_text(
-                json.dumps(data, indent=2, ensure_ascii=False),
+                json.dumps(data, indent=2, ensure_ascii=False, default=FlipkartProduct.to_dict),
                 encoding='utf-8'
             )
             logger.debug(f"Checkpoint saved: {filename}")
         except Exception as e:
             logger.warning(f"Checkpoint failed: {e}")
+        finally:
+            self.timings.record('save.checkpoint', time.perf_counter() - start)
 
     def save_results(self, products: List[Dict], query: str,
                      filename: Optional[str] = None) -> str:
         """Save final results (preserved)."""
+        start = time.perf_counter()
         try:
+            if self.config.output_format == 'jsonl':
+                return self._finish_output(products, query, filename)
+
             if not filename:
                 safe_query = re.sub(r'[^\w]', '_', query)
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 filename = f"flipkart_{safe_query}_{timestamp}.json"
 
+            saved = self._new_or_changed(products)  # all of them unless a dedup index is on
             # Enrich with metadata
             data = {
                 "metadata": {
                     "query": query,
-                    "total": len(products),
+                    "total": len(saved),
+                    "scraped": len(products),
                     "unique": len(self.seen_ids),
                     "stats": self.stats,
                     "timestamp": datetime.now().isoformat(),
-                    "scraper_version": "2.0.0-anchor"
+                    "scraper_version": "2.0.0-anchor",
+                    "timings": self.timings.summary()
                 },
-                "products": products
+                "products": saved
             }
 
             Path(filename).write_text(
-                json.dumps(data, indent=2, ensure_ascii=False),
+                json.dumps(data, indent=2, ensure_ascii=False, default=FlipkartProduct.to_dict),
                 encoding='utf-8'
             )
 
@@ -829,34 +2243,47 @@ class RobustFlipkartScraper:
         except Exception as e:
             logger.error(f"Save failed: {e}")
             raise
+        finally:
+            self.timings.record('save.results', time.perf_counter() - start)
 
-    def display_summary(self, products: List[Dict]):
+    def display_summary(self):
         """Display professional summary (preserved)."""
-        if not products:
+        summary = self.summary
+        if not summary.count:
             print("\n No products found")
             return
 
-        # Statistics
-        in_stock = sum(1 for p in products if p.get('in_stock'))
-        avg_price = sum(p.get('price', 0) for p in products) / len(products) if products else 0
-        avg_discount = sum(p.get('discount', 0) for p in products) / len(products) if products else 0
-        unique_brands = len(set(p.get('brand', '') for p in products if p.get('brand')))
-
         print("\n" + "="*120)
         print(" FLIPKART SEARCH SUMMARY".center(120))
         print("="*120)
-        print(f"Total Products: {len(products):,}")
-        print(f"In Stock: {in_stock:,} ({in_stock/len(products)*100:>5.1f}%)")
-        print(f"Average Price: ₹{avg_price:>10,.0f}")
-        print(f"Average Discount: {avg_discount:>10.1f}%")
-        print(f"Unique Brands: {unique_brands:,}")
+        print(f"Total Products: {summary.count:,}")
+        print(f"In Stock: {summary.in_stock:,} ({summary.in_stock/summary.count*100:>5.1f}%)")
+        print(f"Average Price: ₹{summary.avg_price:>10,.0f}")
+        print(f"Price Range: ₹{summary.price_min:,} - ₹{summary.price_max:,}")
+        print(f"Average Discount: {summary.avg_discount:>10.1f}%")
+        print(f"Unique Brands: {len(summary.brands):,}")
         print(f"Pages Scraped: {self.stats['pages_scraped']}")
+        if self.stats.get('products_unchanged'):
+            print(f"Unchanged Since Last Run: {self.stats['products_unchanged']:,} (not written)")
+        if self.stats.get('requests_blocked'):
+            print(f"Browser Requests: {self.stats['requests_allowed']:,} allowed, {self.stats['requests_blocked']:,} blocked")
+        if self.stats.get('pages_revalidated') or self.stats.get('pages_cached'):
+            print(f"HTTP Pages: {self.stats['pages_fetched']} fetched, {self.stats['pages_revalidated']} revalidated (304), "
+                  f"{self.stats['pages_cached']} from cache")
+        verdicts = self.stats.get('page_verdicts') or {}
+        if any(kind != 'ok' for kind in verdicts):
+            print("Page Verdicts: " + ", ".join(f"{kind} {count}" for kind, count in sorted(verdicts.items())))
         print("="*120)
 
+        if self.timings.totals:
+            print("\n⏱️ STAGE TIMINGS (ms):")
+            print("-"*120)
+            print(self.timings.report())
+
         # Top deals
         print("\n🏆 TOP 10 DEALS:")
         print("-"*120)
-        top_deals = sorted(products, key=lambda x: x.get('discount', 0), reverse=True)[:10]
+        top_deals = summary.top_deals()
 
         for idx, p in enumerate(top_deals, 1):
             title = p['title'][:55]
@@ -866,14 +2293,22 @@ class RobustFlipkartScraper:
                   f"{'✅' if p['in_stock'] else '❌'}")
 
         print("\n" + "✅"*30)
-        print(f" Search completed! Data saved to JSON file.")
+        print(f" Search completed! Data saved to {self.config.output_format.upper()} file.")
         print("✅"*30)
 
     def close(self):
         """Graceful shutdown (preserved)."""
         try:
-            if self.driver:
-                self.driver.quit()
+            if self.output:
+                self.output.close()
+            if self.id_journal:
+                self.id_journal.close()
+            if self.dedup_index:
+                self.dedup_index.close()
+            if self.config.timings_file and self.timings.totals:
+                self.timings.export(self.config.timings_file)
+            if self.browser_pool:
+                self.browser_pool.close()
                 logger.info("🚪 Browser closed")
         except Exception as e:
             logger.warning(f"Close error: {e}")
@@ -903,21 +2338,42 @@ def interactive_mode() -> tuple[str, ScraperConfig, Optional[str]]:
     headless = input("🖥️  Headless mode? (Y/n): ").strip().lower()
     config.headless = headless != 'n'
 
+    try:
+        workers = input(f" Parallel page fetches (1-8, default={config.max_workers}): ").strip()
+        if workers:
+            config.max_workers = max(1, min(int(workers), 8))
+    except:
+        pass
+
     filename = input("💾 Custom filename (optional): ").strip()
+    config.output_file = filename or None
 
     return query, config, filename or None
 
 def main():
     """Entry point (preserved)."""
+    parser = argparse.ArgumentParser(description="Flipkart search scraper")
+    RobustFlipkartScraper.add_output_arguments(parser)
+    parser.add_argument('--http-cache', nargs='?', const='.http_cache', metavar='DIR',
+                        help="reuse search pages fetched within their TTL from an on-disk cache "
+                             "in DIR (default: %(const)s)")
+    parser.add_argument('--revalidate', nargs='?', const='.http_cache/pages', metavar='DIR',
+                        help="refetch pages conditionally (ETag/Last-Modified) and reuse the parsed "
+                             "products on 304, kept in DIR (default: %(const)s)")
+    args = parser.parse_args()
     scraper = None
 
     try:
-        query, config, filename = interactive_mode()
+        query, config, filename = RobustFlipkartScraper.settings_from_args(args, ScraperConfig(), interactive_mode)
+        if args.http_cache:
+            config.http_cache_dir = args.http_cache
+        if args.revalidate:
+            config.revalidate_dir = args.revalidate
 
         scraper = RobustFlipkartScraper(config)
         products = scraper.search(query, config.max_pages)
 
-        scraper.display_summary(products)
+        scraper.display_summary()
 
         saved_file = scraper.save_results(products, query, filename)
         print(f"\n💾 Saved to: {saved_file}")
@@ -6,9 +6,16 @@ import logging
 import sys
 import time
 import argparse
-from typing import Dict, Optional, Any, List
-from dataclasses import dataclass
+import csv
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Optional, Any, List, Set, Tuple, Union, Iterable
+from dataclasses import dataclass, field
 from urllib.parse import urljoin
+from requests.adapters import HTTPAdapter
+
+from scraper_common import (
+    AdaptiveRateLimiter, RetryPolicy, HttpCache, CachingAdapter
+)
 
 # Configure logging
 logging.basicConfig(
@@ -30,12 +37,32 @@ class FlipkartConfig:
     fk_user_agent: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 FKUA/website/42/website/Desktop"
     timeout: int = 30
     max_retries: int = 3
-    retry_delay: int = 2
+    retry_delay: int = 2  # base delay of the exponential backoff
+    retry_max_delay: float = 30.0
+    retry_deadline: float = 90.0  # total seconds per request, retries included
+    batch_size: int = 20  # pidLidMap entries per bulk request (halved when whole chunks fail)
+    max_concurrency: int = 4  # bulk chunks in flight at once
+    # Adaptive pacing of API calls (requests/second): +rate_increase per good response,
+    # x rate_decrease on 429/403/503 or latency spikes
+    rate_initial: float = 2.0
+    rate_min: float = 0.2
+    rate_max: float = 10.0
+    rate_increase: float = 0.2
+    rate_decrease: float = 0.5
+    http_cache_dir: Optional[str] = None  # on-disk response cache (None disables; --http-cache enables)
+    http_cache_ttl: Dict[str, float] = field(default_factory=lambda: {"/api/4/product/swatch": 900})
+    http_cache_max_mb: int = 256
 
 class FlipkartAPIError(Exception):
     """Custom exception for Flipkart API errors"""
     pass
 
+@dataclass
+class BulkResult:
+    """Merged outcome of fetch_products_bulk"""
+    products: Dict[str, Any] = field(default_factory=dict)  # product_id -> response entry
+    failed: List[str] = field(default_factory=list)  # product ids still missing after all retries
+
 class FlipkartScraper:
     """Professional Flipkart Product API Scraper"""
     
@@ -48,6 +75,19 @@ class FlipkartScraper:
             cookie: Authentication cookie (reads from FLIPKART_COOKIE env var if None)
         """
         self.config = config or FlipkartConfig()
+        self.retry_policy = RetryPolicy(
+            max_retries=self.config.max_retries,
+            base_delay=self.config.retry_delay,
+            max_delay=self.config.retry_max_delay,
+            deadline=self.config.retry_deadline
+        )
+        self.rate_limiter = AdaptiveRateLimiter(
+            rate=self.config.rate_initial,
+            min_rate=self.config.rate_min,
+            max_rate=self.config.rate_max,
+            increase=self.config.rate_increase,
+            decrease=self.config.rate_decrease
+        )
         
         # Try multiple ways to get cookie
         self.cookie = cookie or os.getenv('FLIPKART_COOKIE')
@@ -72,6 +112,16 @@ class FlipkartScraper:
         # Initialize session with connection pooling
         self.session = requests.Session()
         self.session.headers.update(self._build_headers())
+        pool_size = max(10, self.config.max_concurrency)
+        if self.config.http_cache_dir:
+            cache = HttpCache(self.config.http_cache_dir, self.config.http_cache_ttl,
+                              self.config.http_cache_max_mb * 1024 * 1024)
+            # keyed by the cookie (responses are per account); only usable payloads are stored
+            adapter = CachingAdapter(cache, storable=self._cacheable, vary=('Cookie', 'Authorization'),
+                                     pool_connections=1, pool_maxsize=pool_size)
+        else:
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
         
         # Test cookie validity
         self._test_cookie()
@@ -109,8 +159,8 @@ class FlipkartScraper:
         }
         
         try:
-            # This will fail with 401 if cookie is invalid
-            self._make_request(test_payload)
+            # This will fail with 401 if cookie is invalid (never answered from the cache)
+            self._make_request(test_payload, headers={"Cache-Control": "no-cache"})
         except FlipkartAPIError as e:
             if "401" in str(e):
                 raise ValueError(
@@ -152,30 +202,37 @@ class FlipkartScraper:
             "showSuperTitle": show_super_title
         }
     
-    def _make_request(self, payload: Dict[str, Any], retries: int = 0) -> requests.Response:
-        """Make POST request with error handling and retry logic"""
+    def _paced_post(self, url: str, payload: Dict[str, Any], headers: Optional[Dict[str, str]],
+                    timeout: float) -> requests.Response:
+        """One POST attempt, paced by the shared rate limiter and fed back to it (cache hits aren't)"""
+        self.rate_limiter.acquire()
+        start = time.monotonic()
+        try:
+            response = self.session.post(url, json=payload, headers=headers, timeout=timeout)
+        except requests.exceptions.RequestException:
+            self.rate_limiter.record(throttled=True)
+            raise
+        if not getattr(response, 'from_cache', False):
+            self.rate_limiter.record(response.status_code, time.monotonic() - start)
+        return response
+    
+    def _make_request(self, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """Make POST request with error handling; transient failures are retried by self.retry_policy"""
         url = urljoin(self.config.base_url, self.config.api_endpoint)
         
         try:
-            response = self.session.post(url, json=payload, timeout=self.config.timeout)
-            response.raise_for_status()
-            return response
-            
-        except requests.exceptions.HTTPError as e:
-            if response.status_code == 401 and retries < self.config.max_retries:
-                logger.warning(f"Authentication failed. Retry {retries + 1}/{self.config.max_retries}")
-                time.sleep(self.config.retry_delay)
-                return self._make_request(payload, retries + 1)
-            logger.error(f"HTTP {response.status_code}: {response.text}")
-            raise FlipkartAPIError(f"HTTP Error {response.status_code}: {response.text}")
-                
+            response = self.retry_policy.call(
+                lambda timeout: self._paced_post(url, payload, headers, timeout),
+                self.config.timeout
+            )
         except requests.exceptions.RequestException as e:
-            if retries < self.config.max_retries:
-                logger.warning(f"Request failed. Retry {retries + 1}/{self.config.max_retries}")
-                time.sleep(self.config.retry_delay)
-                return self._make_request(payload, retries + 1)
             logger.error(f"Request error: {e}")
             raise FlipkartAPIError(f"Request Error: {e}")
+        
+        if not response.ok:
+            logger.error(f"HTTP {response.status_code}: {response.text}")
+            raise FlipkartAPIError(f"HTTP Error {response.status_code}: {response.text}")
+        return response
     
     def fetch_product_data(
         self, 
@@ -222,6 +279,116 @@ class FlipkartScraper:
             logger.error(f"Invalid JSON response: {e}")
             raise FlipkartAPIError(f"JSON Parse Error: {e}")
     
+    def fetch_products_bulk(
+        self,
+        products: Iterable[Union[Dict[str, str], Tuple[str, str]]],
+        pincode: str = "",
+        query: str = "",
+        store_path: str = "clo/ash/axc/mmk/bk1",
+        view_type: str = "QUICK_VIEW",
+        **kwargs
+    ) -> BulkResult:
+        """
+        Fetch any number of products via chunked pidLidMap requests
+        
+        The pairs are split into chunks of config.batch_size, sent concurrently over the
+        pooled session and merged by product id. Ids missing from a response (or from a
+        chunk that failed outright) are retried on their own, up to config.max_retries
+        rounds; chunk size is halved after a round in which whole chunks failed.
+        
+        Args:
+            products: {"product_id": ..., "listing_id": ...} dicts or (product_id, listing_id) tuples
+            pincode, query, store_path, view_type, **kwargs: As for fetch_product_data
+        
+        Returns:
+            BulkResult with per-product entries (in input order) and the ids that never came back
+        """
+        pending: Dict[str, str] = {}
+        for p in products:
+            pid, lid = (p['product_id'], p['listing_id']) if isinstance(p, dict) else p
+            pending[pid] = lid
+        if not pending:
+            raise ValueError("Products list cannot be empty")
+        
+        order = list(pending)
+        payload_kwargs = dict(pincode=pincode, query=query, store_path=store_path,
+                              view_type=view_type, **kwargs)
+        found: Dict[str, Any] = {}
+        chunk_size = max(1, self.config.batch_size)
+        
+        for attempt in range(self.config.max_retries + 1):
+            if not pending:
+                break
+            if attempt:
+                logger.warning(f"Retrying {len(pending)} missing product(s) in chunks of {chunk_size} "
+                               f"({attempt}/{self.config.max_retries})")
+                time.sleep(self.retry_policy.backoff(attempt - 1))
+            
+            items = list(pending.items())
+            chunks = [dict(items[i:i + chunk_size]) for i in range(0, len(items), chunk_size)]
+            logger.info(f"Fetching {len(items)} product(s) in {len(chunks)} chunk(s)")
+            
+            chunk_failures = 0
+            with ThreadPoolExecutor(max_workers=min(self.config.max_concurrency, len(chunks))) as pool:
+                futures = {
+                    pool.submit(self._fetch_chunk, chunk, payload_kwargs): chunk for chunk in chunks
+                }
+                for future in as_completed(futures):
+                    try:
+                        entries = future.result()
+                    except FlipkartAPIError as e:
+                        chunk_failures += 1
+                        logger.warning(f"Chunk of {len(futures[future])} product(s) failed: {e}")
+                        continue
+                    found.update(entries)
+                    for pid in entries:
+                        pending.pop(pid, None)
+            
+            if chunk_failures:
+                chunk_size = max(1, chunk_size // 2)
+        
+        if pending:
+            logger.error(f"{len(pending)} product(s) missing after {self.config.max_retries} retries")
+        return BulkResult(
+            products={pid: found[pid] for pid in order if pid in found},
+            failed=[pid for pid in order if pid in pending]
+        )
+    
+    def _fetch_chunk(self, pid_lid_map: Dict[str, str], payload_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """POST one pidLidMap chunk and return its entries keyed by product id"""
+        payload = self._build_payload(pid_lid_map=pid_lid_map, **payload_kwargs)
+        response = self._make_request(payload)
+        try:
+            data = response.json()
+        except ValueError as e:
+            raise FlipkartAPIError(f"JSON Parse Error: {e}")
+        return self._entries_by_product(data, set(pid_lid_map))
+    
+    @classmethod
+    def _cacheable(cls, response: requests.Response) -> bool:
+        """Store only JSON that parses and holds entries for the requested products"""
+        try:
+            data = response.json()
+            pids = set(json.loads(response.request.body)['pidLidMap'])
+        except (ValueError, KeyError, TypeError):
+            return False
+        return bool(cls._entries_by_product(data, pids))
+    
+    @staticmethod
+    def _entries_by_product(data: Any, pids: Set[str]) -> Dict[str, Any]:
+        """Per-product entries of a response: the first mapping keyed by the requested ids"""
+        stack = [data]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                hits = pids.intersection(node)
+                if hits:
+                    return {pid: node[pid] for pid in hits}
+                stack.extend(node.values())
+            elif isinstance(node, list):
+                stack.extend(node)
+        return {}
+    
     def save_to_file(self, data: Dict[str, Any], filename: str = "flipkart_response.json"):
         """Save data to JSON file"""
         try:
@@ -278,12 +445,27 @@ def get_user_input() -> Dict[str, Any]:
         "store_path": store_path or "clo/ash/axc/mmk/bk1"
     }
 
+def load_pairs(path: str) -> List[Dict[str, str]]:
+    """Read product/listing id pairs from a JSON list or a two-column CSV"""
+    with open(path, encoding="utf-8") as f:
+        if path.lower().endswith(".json"):
+            return [{"product_id": p["product_id"], "listing_id": p["listing_id"]} for p in json.load(f)]
+        return [
+            {"product_id": row[0].strip(), "listing_id": row[1].strip()}
+            for row in csv.reader(f)
+            if len(row) >= 2 and row[0].strip() and row[0].strip().lower() != "product_id"
+        ]
+
 def main():
     """CLI entry point"""
     parser = argparse.ArgumentParser(description="Scrape Flipkart product data")
     parser.add_argument("--cookie", help="Flipkart cookie string")
     parser.add_argument("--env-file", help="Path to .env file", default=".env")
     parser.add_argument("--test", action="store_true", help="Test cookie validity and exit")
+    parser.add_argument("--pairs-file", help="JSON list or CSV of product_id,listing_id pairs to fetch in bulk")
+    parser.add_argument("--output", help="Output file for --pairs-file", default="flipkart_bulk_response.json")
+    parser.add_argument("--http-cache", nargs="?", const=".http_cache", metavar="DIR",
+                        help="Reuse swatch-API responses within their TTL from an on-disk cache in DIR")
     args = parser.parse_args()
     
     try:
@@ -294,13 +476,21 @@ def main():
             logger.info(f"Loaded environment from {args.env_file}")
         
         # Initialize scraper
-        scraper = FlipkartScraper(cookie=args.cookie)
+        config = FlipkartConfig(http_cache_dir=args.http_cache)
+        scraper = FlipkartScraper(config=config, cookie=args.cookie)
         
         if args.test:
             print("Cookie is valid!")
             scraper.close()
             sys.exit(0)
         
+        if args.pairs_file:
+            pairs = load_pairs(args.pairs_file)
+            result = scraper.fetch_products_bulk(pairs)
+            scraper.save_to_file({"products": result.products, "failed": result.failed}, args.output)
+            print(f"\n✅ Success! Fetched {len(result.products)}/{len(pairs)} product(s)")
+            return
+        
         # Get input
         user_inputs = get_user_input()
         
@@ -5,6 +5,7 @@ import sys
 import time
 import random
 import re
+import argparse
 import atexit
 from datetime import datetime
 from typing import Dict, List, Optional, Any, Set
@@ -23,7 +24,11 @@ from selenium.common.exceptions import (
     NoSuchElementException, 
     StaleElementReferenceException
 )
-from webdriver_manager.chrome import ChromeDriverManager
+
+from scraper_common import (
+    FlipkartProduct, stable_id, resolve_chromedriver, JsonlWriter, RunSummary, IdJournal,
+    SeenIndex, AdaptiveRateLimiter, ResumableOutputMixin
+)
 
 # ==================== CONFIGURATION ====================
 
@@ -33,11 +38,31 @@ class ScraperConfig:
         self.headless: bool = True
         self.max_pages: int = 5
         self.timeout: int = 20
-        self.min_delay: float = 2.0
-        self.max_delay: float = 4.0
+        # Adaptive pacing (replaces the fixed random delay): requests/second, raised by rate_increase per
+        # good response and multiplied by rate_decrease on 429/403/503, captcha pages or latency spikes
+        self.rate_initial: float = 0.33
+        self.rate_min: float = 0.1
+        self.rate_max: float = 1.0
+        self.rate_increase: float = 0.05
+        self.rate_decrease: float = 0.5
         self.retry_attempts: int = 3
         self.retry_delay: float = 2.5
         self.save_interval: int = 100
+        # Output: 'json' writes one pretty-printed dump at the end; 'jsonl' (--jsonl) appends one
+        # product per line to a single file as pages are parsed; compression is None, 'gzip' or 'zstd'
+        self.output_format: str = 'json'
+        self.output_compression: Optional[str] = None
+        self.output_file: Optional[str] = None
+        self.fsync_every: int = 200          # lines between fsyncs of the output stream
+        self.fsync_seconds: float = 5.0      # ...or seconds, whichever comes first
+        # Resumable runs (JSONL only): done pages, seen-id log and output offset for --resume
+        self.checkpoint_file: str = 'flipkart_checkpoint.json'
+        self.resume: bool = False
+        # Cross-run dedup: SQLite index of product id -> content hash, so only products that are new
+        # or changed since earlier runs get written (None disables; --dedup-index enables). 'preload'
+        # reads the index into memory at startup; 'mmap' memory-maps the database and looks ids up in place
+        self.dedup_index_file: Optional[str] = None
+        self.dedup_index_mode: str = 'preload'
         self.user_agents: List[str] = [
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
@@ -80,35 +105,133 @@ class ScraperConfig:
             'link': 'a[href*="pid="], a[href*="/p/"]'
         }
 
-# ==================== DATA MODELS ====================
+        # Extract all cards with one in-page script per page instead of a call per field
+        self.in_page_extraction: bool = True
 
-class FlipkartProduct:
-    """Validated product data model"""
-    def __init__(self, **kwargs):
-        self.title: str = kwargs.get('title', '').strip()
-        self.product_id: str = kwargs.get('product_id', '')
-        self.price: int = kwargs.get('price', 0)
-        self.original_price: int = kwargs.get('original_price', 0)
-        self.discount: int = kwargs.get('discount', 0)
-        self.rating: float = kwargs.get('rating', 0.0)
-        self.rating_count: int = kwargs.get('rating_count', 0)
-        self.brand: str = kwargs.get('brand', '').strip()
-        self.product_url: str = kwargs.get('product_url', '')
-        self.in_stock: bool = kwargs.get('in_stock', True)
-        self.thumbnail: str = kwargs.get('thumbnail', '')
-        self.page_number: int = kwargs.get('page_number', 0)
-        self.timestamp: str = kwargs.get('timestamp', datetime.now().isoformat())
-    
-    def is_valid(self) -> bool:
-        """Validate essential fields"""
-        return bool(self.title and self.product_id and self.price > 0)
-    
-    def to_dict(self) -> Dict[str, Any]:
-        return self.__dict__
+        # Browser requests dropped via CDP Network.setBlockedURLs; only the document, stylesheets, scripts and
+        # XHRs go through (product data never needs images, fonts, media or trackers)
+        self.block_resources: bool = True
+        self.blocked_url_patterns: List[str] = [
+            '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+            '*.woff', '*.woff2', '*.ttf', '*.otf',
+            '*.mp4', '*.webm', '*.m3u8',
+            '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+            '*googlesyndication.com*', '*facebook.net*', '*omtrdc.net*', '*hotjar.com*'
+        ]
+        # CSS is kept by default: without it hidden elements show up in innerText and card text changes
+        self.block_stylesheets: bool = False
+
+        # Scroll completion: done after scroll_quiet_ms without DOM changes, capped at scroll_max_wait seconds
+        self.scroll_quiet_ms: int = 300
+        self.scroll_max_wait: float = 4.0
+
+# ==================== IN-PAGE EXTRACTION ====================
+
+# Runs inside the browser via execute_script(script, selectors). Applies the same selector
+# fallbacks as _parse_product to every card and returns raw strings for all of them, so a
+# page costs one round-trip instead of several per field per card.
+EXTRACT_CARDS_JS = r"""
+const sel = arguments[0];
+const first = (card, selector) => {
+    try { return card.querySelector(selector); } catch (e) { return null; }
+};
+const pick = (card, selectors, numeric) => {
+    for (const s of selectors) {
+        const el = first(card, s);
+        if (!el) continue;
+        const text = (el.getAttribute('title') || '').trim() || (el.innerText || '').trim();
+        if (text && (!numeric || /\d/.test(text))) return text;
+    }
+    return '';
+};
+const outOfStock = sel.out_of_stock.join(',');
+return Array.from(document.querySelectorAll(sel.product_container), (card) => {
+    const anchor = card.querySelector('a');
+    const link = first(card, sel.link);
+    let image = '';
+    for (const s of sel.image) {
+        const img = first(card, s);
+        if (img && img.getAttribute('src')) { image = img.getAttribute('src'); break; }
+    }
+    return {
+        id: card.getAttribute('data-id') || '',
+        anchor_text: anchor ? (anchor.innerText || '').trim() : null,
+        title: pick(card, sel.title),
+        brand: pick(card, sel.brand),
+        price: pick(card, sel.current_price, true),
+        original_price: pick(card, sel.original_price, true),
+        rating: pick(card, sel.rating),
+        rating_count: pick(card, sel.rating_count),
+        out_of_stock: first(card, outOfStock) !== null,
+        link: link ? (link.getAttribute('href') || '') : '',
+        image: image
+    };
+});
+"""
+
+# Scrolls to the bottom and resolves once the page goes quiet: every DOM mutation restarts a
+# short quiet timer; when it fires the page is scrolled again if the product count grew (or the
+# loader is still showing), otherwise the wait ends. max_ms is a hard cap.
+SCROLL_UNTIL_SETTLED_JS = r"""
+const opts = arguments[0];
+const done = arguments[arguments.length - 1];
+const started = Date.now();
+const count = () => document.querySelectorAll(opts.container).length;
+let last = count();
+let quietTimer = null;
+let capTimer = null;
+const finish = (reason) => {
+    observer.disconnect();
+    clearTimeout(quietTimer);
+    clearTimeout(capTimer);
+    done({products: count(), reason: reason, ms: Date.now() - started});
+};
+const check = () => {
+    const now = count();
+    if (now > last || document.querySelector(opts.loader)) {
+        last = now;
+        window.scrollTo(0, document.body.scrollHeight);
+        restart();
+    } else {
+        finish('settled');
+    }
+};
+const restart = () => {
+    clearTimeout(quietTimer);
+    quietTimer = setTimeout(check, opts.quiet_ms);
+};
+const observer = new MutationObserver(restart);
+observer.observe(document.body, {childList: true, subtree: true});
+capTimer = setTimeout(() => finish('cap'), opts.max_ms);
+window.scrollTo(0, document.body.scrollHeight);
+restart();
+"""
+
+# ==================== RESOURCE BLOCKING ====================
+
+def block_resources(driver, patterns: List[str]):
+    """Drop matching requests inside Chrome (CDP) so they never reach the network"""
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+
+def count_requests(driver) -> tuple[int, int]:
+    """(allowed, blocked) browser requests since the last call, from the performance log"""
+    try:
+        entries = driver.get_log('performance')
+    except Exception:
+        return 0, 0
+    sent = blocked = 0
+    for entry in entries:
+        message = entry.get('message', '')
+        if '"Network.requestWillBeSent"' in message:
+            sent += 1
+        elif '"Network.loadingFailed"' in message and '"blockedReason"' in message:
+            blocked += 1
+    return sent - blocked, blocked
 
 # ==================== CORE SCRAPER ====================
 
-class RobustFlipkartScraper:
+class RobustFlipkartScraper(ResumableOutputMixin):
     """Production-ready Flipkart scraper"""
     
     def __init__(self, config: Optional[ScraperConfig] = None):
@@ -116,11 +239,28 @@ class RobustFlipkartScraper:
         self.driver: Optional[webdriver.Chrome] = None
         self.wait: Optional[WebDriverWait] = None
         self.seen_ids: Set[str] = set()
+        self.output: Optional[JsonlWriter] = None
+        self.summary = RunSummary()
+        self._run: Optional[Dict[str, Any]] = None  # resumable state of the current search
+        self.id_journal: Optional[IdJournal] = None
+        self.dedup_index: Optional[SeenIndex] = None
+        if self.config.dedup_index_file:
+            self.dedup_index = SeenIndex(self.config.dedup_index_file, self.config.dedup_index_mode)
+        self.rate_limiter = AdaptiveRateLimiter(
+            rate=self.config.rate_initial,
+            min_rate=self.config.rate_min,
+            max_rate=self.config.rate_max,
+            increase=self.config.rate_increase,
+            decrease=self.config.rate_decrease
+        )
         self.stats = {
             'pages_scraped': 0,
             'products_found': 0,
             'products_valid': 0,
-            'errors': 0
+            'errors': 0,
+            'products_unchanged': 0,
+            'requests_allowed': 0,
+            'requests_blocked': 0
         }
         
         self._initialize_driver()
@@ -153,9 +293,17 @@ class RobustFlipkartScraper:
                 "profile.managed_default_content_settings.images": 2
             })
             
-            service = Service(ChromeDriverManager().install())
+            if self.config.block_resources:
+                # performance log is what count_requests reads the per-page counts from
+                options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+            service = Service(resolve_chromedriver())
             self.driver = webdriver.Chrome(service=service, options=options)
+            if self.config.block_resources:
+                block_resources(self.driver, self.config.blocked_url_patterns
+                                + (['*.css'] if self.config.block_stylesheets else []))
             self.wait = WebDriverWait(self.driver, self.config.timeout)
+            self.driver.set_script_timeout(self.config.scroll_max_wait + self.config.timeout)
             
             # Stealth scripts
             self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
@@ -170,10 +318,6 @@ class RobustFlipkartScraper:
             logger.error(f"❌ Driver init failed: {e}")
             raise
     
-    def _random_delay(self):
-        """Random delay for anti-detection"""
-        time.sleep(random.uniform(self.config.min_delay, self.config.max_delay))
-    
     @contextmanager
     def _page_timeout(self):
         """Context manager for page timeouts"""
@@ -184,24 +328,28 @@ class RobustFlipkartScraper:
         finally:
             self.driver.set_page_load_timeout(old_timeout)
     
-    def search(self, query: str, max_pages: Optional[int] = None) -> List[Dict[str, Any]]:
+    def search(self, query: str, max_pages: Optional[int] = None) -> List[FlipkartProduct]:
         """Main search function with comprehensive error handling"""
         max_pages = max_pages or self.config.max_pages
         logger.info(f"🔍 Searching '{query}' (max {max_pages} pages)")
         
         base_url = f"https://www.flipkart.com/search?q={quote_plus(query)}"
         all_products = []
+        done = self._resume_checkpoint(query, max_pages)
         
         try:
             for page in range(1, max_pages + 1):
+                if page in done:
+                    continue
                 logger.info(f"\n📄 Page {page}/{max_pages}")
                 
                 try:
                     page_products = self._scrape_page(base_url, page)
-                    all_products.extend(page_products)
+                    self._collect_products(query, page_products, all_products)
                     
                     # Progress checkpoint
-                    if len(all_products) % self.config.save_interval == 0:
+                    if (self.config.output_format == 'jsonl'
+                            or self.summary.count % self.config.save_interval == 0):
                         self._save_checkpoint(all_products, query, page)
                     
                     # Early exit detection
@@ -209,14 +357,13 @@ class RobustFlipkartScraper:
                         logger.info("⚠️ Low product count, ending search")
                         break
                     
-                    self._random_delay()
-                    
                 except Exception as e:
                     logger.error(f"❌ Page {page} failed: {e}")
                     continue
             
-            self.stats['products_valid'] = len(all_products)
-            logger.info(f"✅ Found {len(all_products)} unique products")
+            self._run['complete'] = True
+            self.stats['products_valid'] = self.summary.count
+            logger.info(f"✅ Found {self.summary.count} unique products")
             return all_products
             
         except KeyboardInterrupt:
@@ -226,11 +373,12 @@ class RobustFlipkartScraper:
         
         return all_products
     
-    def _scrape_page(self, base_url: str, page: int) -> List[Dict[str, Any]]:
+    def _scrape_page(self, base_url: str, page: int) -> List[FlipkartProduct]:
         """Scrape single page with smart loading"""
         url = f"{base_url}&page={page}" if page > 1 else base_url
         
         try:
+            self.rate_limiter.acquire()
             with self._page_timeout():
                 self.driver.get(url)
             
@@ -247,19 +395,44 @@ class RobustFlipkartScraper:
             # Extract products
             products = self._extract_products(page)
             
+            self.rate_limiter.record()
             self.stats['pages_scraped'] += 1
             logger.info(f"📦 Extracted {len(products)} products")
             return products
             
         except TimeoutException:
+            self.rate_limiter.record(throttled=True)  # no results grid: slow, blocked or a captcha
             logger.warning(f"⏰ Timeout on page {page}")
             return []
         except Exception as e:
             logger.error(f"❌ Page {page} error: {e}")
             return []
+        finally:
+            self._record_requests()
+    
+    def _record_requests(self):
+        """Add the last page's allowed/blocked browser request counts to stats"""
+        if self.config.block_resources:
+            allowed, blocked = count_requests(self.driver)
+            self.stats['requests_allowed'] += allowed
+            self.stats['requests_blocked'] += blocked
     
     def _smart_scroll(self):
-        """Dynamic scroll detection"""
+        """Scroll until the product count stops growing (event-driven, capped)"""
+        try:
+            result = self.driver.execute_async_script(SCROLL_UNTIL_SETTLED_JS, {
+                'container': self.config.selectors['product_container'],
+                'loader': 'div._2bnFzA',
+                'quiet_ms': self.config.scroll_quiet_ms,
+                'max_ms': int(self.config.scroll_max_wait * 1000)
+            })
+            logger.debug(f"📜 Scroll {result['reason']} after {result['ms']}ms ({result['products']} cards)")
+        except Exception as e:
+            logger.debug(f"Event-driven scroll failed, using fixed sleeps: {e}")
+            self._fixed_scroll()
+    
+    def _fixed_scroll(self):
+        """Dynamic scroll detection (fixed sleeps)"""
         last_height = self.driver.execute_script("return document.body.scrollHeight")
         scroll_attempts = 0
         
@@ -276,9 +449,16 @@ class RobustFlipkartScraper:
             last_height = new_height
             scroll_attempts += 1
     
-    def _extract_products(self, page_num: int) -> List[Dict[str, Any]]:
+    def _extract_products(self, page_num: int) -> List[FlipkartProduct]:
         """Extract with deduplication"""
+        if self.config.in_page_extraction:
+            try:
+                return self._extract_products_in_page(page_num)
+            except Exception as e:
+                logger.debug(f"In-page extraction failed, parsing per element: {e}")
+        
         products = []
+        timestamp = datetime.now().isoformat()  # one per page
         elements = self.driver.find_elements(
             By.CSS_SELECTOR, self.config.selectors['product_container']
         )
@@ -289,7 +469,8 @@ class RobustFlipkartScraper:
                 if product and product.is_valid():
                     if product.product_id not in self.seen_ids:
                         self.seen_ids.add(product.product_id)
-                        products.append(product.to_dict())
+                        product.timestamp = timestamp
+                        products.append(product)
             except StaleElementReferenceException:
                 continue  # Skip stale elements
             except Exception as e:
@@ -298,6 +479,59 @@ class RobustFlipkartScraper:
         
         return products
     
+    def _extract_products_in_page(self, page_num: int) -> List[FlipkartProduct]:
+        """Extract with deduplication from a single execute_script round-trip"""
+        products = []
+        timestamp = datetime.now().isoformat()  # one per page
+        for raw in self.driver.execute_script(EXTRACT_CARDS_JS, self.config.selectors):
+            product = self._product_from_raw(raw, page_num)
+            if product and product.is_valid():
+                if product.product_id not in self.seen_ids:
+                    self.seen_ids.add(product.product_id)
+                    product.timestamp = timestamp
+                    products.append(product)
+        return products
+    
+    def _product_from_raw(self, raw: Dict[str, Any], page_num: int) -> Optional[FlipkartProduct]:
+        """Build a product from the raw strings returned by EXTRACT_CARDS_JS"""
+        product_id = raw.get('id')
+        if not product_id:
+            # Fallback: generate from title hash
+            if raw.get('anchor_text') is None:
+                return None
+            product_id = stable_id('pid', raw['anchor_text'])
+        
+        title = raw.get('title', '')
+        if not title:
+            return None
+        
+        current_price = int(re.sub(r'[^\d]', '', raw.get('price', '')) or 0)
+        original_price = int(re.sub(r'[^\d]', '', raw.get('original_price', '')) or 0) or current_price
+        
+        try:
+            rating = float(raw['rating'].split()[0]) if raw.get('rating') else 0.0
+        except ValueError:
+            rating = 0.0
+        rating_count = int(re.sub(r'[^\d]', '', raw.get('rating_count', '')) or 0)
+        
+        href = raw.get('link', '')
+        product_url = f"https://www.flipkart.com{href}" if href.startswith('/') else href
+        
+        return FlipkartProduct(
+            title=title,
+            product_id=product_id,
+            brand=raw.get('brand', ''),
+            price=current_price,
+            original_price=original_price,
+            discount=self._calculate_discount(current_price, original_price),
+            rating=rating,
+            rating_count=rating_count,
+            product_url=product_url,
+            in_stock=not raw.get('out_of_stock'),
+            thumbnail=raw.get('image', '').replace("200/200", "400/400"),
+            page_number=page_num
+        )
+    
     def _parse_product(self, element, page_num: int) -> Optional[FlipkartProduct]:
         """Parse product with intelligent fallbacks"""
         try:
@@ -307,7 +541,7 @@ class RobustFlipkartScraper:
                 # Fallback: generate from title hash
                 title_elem = element.find_elements(By.CSS_SELECTOR, "a")
                 if title_elem:
-                    product_id = f"pid_{hash(title_elem[0].text) % 100000}"
+                    product_id = stable_id('pid', title_elem[0].text)
                 else:
                     return None
             
@@ -353,8 +587,7 @@ class RobustFlipkartScraper:
                 product_url=product_url,
                 in_stock=in_stock,
                 thumbnail=thumbnail,
-                page_number=page_num,
-                timestamp=datetime.now().isoformat()
+                page_number=page_num
             )
             
         except Exception as e:
@@ -443,6 +676,17 @@ class RobustFlipkartScraper:
     def _save_checkpoint(self, products: List[Dict], query: str, page: Any):
         """Save progress"""
         try:
+            if self.config.output_format == 'jsonl':
+                # products are already on disk line by line; the checkpoint makes them durable
+                # and records what a --resume run needs to skip done pages and known products
+                if self._run is None:
+                    return
+                if isinstance(page, int):
+                    self._run['pages'].append(page)
+                self._write_resume_state()
+                logger.debug(f"Checkpoint saved: {self.config.checkpoint_file} (page {page})")
+                return
+
             safe_query = re.sub(r'[^\w]', '_', query)
             filename = f"checkpoint_{safe_query}_p{page}_{int(time.time())}.json"
             
@@ -455,7 +699,7 @@ class RobustFlipkartScraper:
             }
             
             Path(filename).write_text(
-                json.dumps(data, indent=2, ensure_ascii=False), 
+                json.dumps(data, indent=2, ensure_ascii=False, default=FlipkartProduct.to_dict), 
                 encoding='utf-8'
             )
             logger.debug(f"Checkpoint saved: {filename}")
@@ -466,26 +710,31 @@ class RobustFlipkartScraper:
                      filename: Optional[str] = None) -> str:
         """Save final results"""
         try:
+            if self.config.output_format == 'jsonl':
+                return self._finish_output(products, query, filename)
+
             if not filename:
                 safe_query = re.sub(r'[^\w]', '_', query)
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 filename = f"flipkart_{safe_query}_{timestamp}.json"
             
+            saved = self._new_or_changed(products)  # all of them unless a dedup index is on
             # Enrich with metadata
             data = {
                 "metadata": {
                     "query": query,
-                    "total": len(products),
+                    "total": len(saved),
+                    "scraped": len(products),
                     "unique": len(self.seen_ids),
                     "stats": self.stats,
                     "timestamp": datetime.now().isoformat(),
                     "scraper_version": "2.0.0"
                 },
-                "products": products
+                "products": saved
             }
             
             Path(filename).write_text(
-                json.dumps(data, indent=2, ensure_ascii=False),
+                json.dumps(data, indent=2, ensure_ascii=False, default=FlipkartProduct.to_dict),
                 encoding='utf-8'
             )
             
@@ -496,33 +745,33 @@ class RobustFlipkartScraper:
             logger.error(f"Save failed: {e}")
             raise
     
-    def display_summary(self, products: List[Dict]):
+    def display_summary(self):
         """Display professional summary"""
-        if not products:
+        summary = self.summary
+        if not summary.count:
             print("\n❌ No products found")
             return
         
-        # Statistics
-        in_stock = sum(1 for p in products if p.get('in_stock'))
-        avg_price = sum(p.get('price', 0) for p in products) / len(products)
-        avg_discount = sum(p.get('discount', 0) for p in products) / len(products)
-        unique_brands = len(set(p.get('brand', '') for p in products if p.get('brand')))
-        
         print("\n" + "="*120)
         print("📊 FLIPKART SEARCH SUMMARY".center(120))
         print("="*120)
-        print(f"Total Products: {len(products):,}")
-        print(f"In Stock: {in_stock:,} ({in_stock/len(products)*100:>5.1f}%)")
-        print(f"Average Price: ₹{avg_price:>10,.0f}")
-        print(f"Average Discount: {avg_discount:>10.1f}%")
-        print(f"Unique Brands: {unique_brands:,}")
+        print(f"Total Products: {summary.count:,}")
+        print(f"In Stock: {summary.in_stock:,} ({summary.in_stock/summary.count*100:>5.1f}%)")
+        print(f"Average Price: ₹{summary.avg_price:>10,.0f}")
+        print(f"Price Range: ₹{summary.price_min:,} - ₹{summary.price_max:,}")
+        print(f"Average Discount: {summary.avg_discount:>10.1f}%")
+        print(f"Unique Brands: {len(summary.brands):,}")
         print(f"Pages Scraped: {self.stats['pages_scraped']}")
+        if self.stats.get('products_unchanged'):
+            print(f"Unchanged Since Last Run: {self.stats['products_unchanged']:,} (not written)")
+        if self.stats.get('requests_blocked'):
+            print(f"Browser Requests: {self.stats['requests_allowed']:,} allowed, {self.stats['requests_blocked']:,} blocked")
         print("="*120)
         
         # Top deals
         print("\n🏆 TOP 10 DEALS:")
         print("-"*120)
-        top_deals = sorted(products, key=lambda x: x.get('discount', 0), reverse=True)[:10]
+        top_deals = summary.top_deals()
         
         for idx, p in enumerate(top_deals, 1):
             title = p['title'][:55]
@@ -532,12 +781,18 @@ class RobustFlipkartScraper:
                   f"{'✅' if p['in_stock'] else '❌'}")
         
         print("\n" + "✅"*30)
-        print(f" Search completed! Data saved to JSON file.")
+        print(f" Search completed! Data saved to {self.config.output_format.upper()} file.")
         print("✅"*30)
     
     def close(self):
         """Graceful shutdown"""
         try:
+            if self.output:
+                self.output.close()
+            if self.id_journal:
+                self.id_journal.close()
+            if self.dedup_index:
+                self.dedup_index.close()
             if self.driver:
                 self.driver.quit()
                 logger.info("🚪 Browser closed")
@@ -570,20 +825,24 @@ def interactive_mode() -> tuple[str, ScraperConfig, Optional[str]]:
     config.headless = headless != 'n'
     
     filename = input("💾 Custom filename (optional): ").strip()
+    config.output_file = filename or None
     
     return query, config, filename or None
 
 def main():
     """Entry point"""
+    parser = argparse.ArgumentParser(description="Flipkart search scraper")
+    RobustFlipkartScraper.add_output_arguments(parser)
+    args = parser.parse_args()
     scraper = None
     
     try:
-        query, config, filename = interactive_mode()
+        query, config, filename = RobustFlipkartScraper.settings_from_args(args, ScraperConfig(), interactive_mode)
         
         scraper = RobustFlipkartScraper(config)
         products = scraper.search(query, config.max_pages)
         
-        scraper.display_summary(products)
+        scraper.display_summary()
         
         saved_file = scraper.save_results(products, query, filename)
         print(f"\n💾 Saved to: {saved_file}")
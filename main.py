@@ -6,8 +6,10 @@ import time
 import random
 import re
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 from typing import Dict, List, Optional, Any, Set
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import quote_plus, urlparse, parse_qs
 from bs4 import BeautifulSoup
 
@@ -19,7 +21,11 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
-from webdriver_manager.chrome import ChromeDriverManager
+
+from scraper_common import (
+    resolve_chromedriver, BrowserPool, new_seen_ids, AdaptiveRateLimiter, HttpCache, CachingAdapter,
+    StageTimings, time_connections, timing_context, extract_page_state, iter_state_products, state_get
+)
 
 # =============================
 # Configuration
@@ -30,6 +36,22 @@ BASE_URL = "https://www.flipkart.com/search"
 TIMEOUT = 12
 MAX_RETRIES = 3
 MIN_PRODUCTS_THRESHOLD = 10
+MAX_CONCURRENCY = 2          # pages fetched at once (input: max_concurrency)
+RATE_INITIAL = 1.0           # adaptive pacing shared by HTTP and Selenium, requests/second
+RATE_MIN, RATE_MAX = 0.2, 4.0
+RATE_INCREASE = 0.1          # added per good response...
+RATE_DECREASE = 0.5          # ...multiplier on 429/403/503, captcha pages or latency spikes
+BROWSER_POOL_SIZE = 1        # Chrome instances for the Selenium fallback (input: browser_pool_size)
+BROWSER_RECYCLE_AFTER = 50   # pages rendered per driver before it is restarted
+PUSH_BATCH_SIZE = 200        # flush the dataset buffer at this many items...
+PUSH_INTERVAL = 5.0          # ...or when it is this many seconds old
+HTTP_CACHE_DIR = ".http_cache"                 # on-disk response cache (input: http_cache)
+HTTP_CACHE_TTL = {"flipkart.com/search": 600}  # seconds, per URL fragment
+HTTP_CACHE_MAX_MB = 256
+DEDUP_ACROSS_PAGES = False   # also drop products pushed from an earlier page (input: dedup_across_pages)
+DEDUP_BACKEND = "exact"      # id set for dedup_across_pages: 'exact' or 'bloom' (input: dedup_backend)
+DEDUP_ERROR_RATE = 0.001     # bloom false-positive rate (input: dedup_error_rate)
+DEDUP_INITIAL_CAPACITY = 100_000
 
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -105,31 +127,38 @@ def parse_product(element, page: int, keyword: str) -> dict:
         if not product_id: return None
 
         # 2. Title
-        title = get_text_fallback(element, SELECTORS['title'])
+        with TIMINGS.time('field.title'):
+            title = get_text_fallback(element, SELECTORS['title'])
         if not title: return None
 
         # 3. Prices
-        price_txt = get_text_fallback(element, SELECTORS['current_price'])
+        with TIMINGS.time('field.current_price'):
+            price_txt = get_text_fallback(element, SELECTORS['current_price'])
         price = int(re.sub(r'[^\d]', '', price_txt)) if price_txt else 0
         
-        orig_txt = get_text_fallback(element, SELECTORS['original_price'])
+        with TIMINGS.time('field.original_price'):
+            orig_txt = get_text_fallback(element, SELECTORS['original_price'])
         orig_price = int(re.sub(r'[^\d]', '', orig_txt)) if orig_txt else price
 
         # 4. Meta
-        brand = get_text_fallback(element, SELECTORS['brand'])
-        rating_txt = get_text_fallback(element, SELECTORS['rating'])
+        with TIMINGS.time('field.brand'):
+            brand = get_text_fallback(element, SELECTORS['brand'])
+        with TIMINGS.time('field.rating'):
+            rating_txt = get_text_fallback(element, SELECTORS['rating'])
         rating = float(rating_txt.split()[0]) if rating_txt else 0.0
 
         # 5. Image & Link
         image = ""
-        for sel in SELECTORS['image']:
-            imgs = element.find_elements(By.CSS_SELECTOR, sel)
-            if imgs:
-                image = imgs[0].get_attribute("src")
-                break
+        with TIMINGS.time('field.image'):
+            for sel in SELECTORS['image']:
+                imgs = element.find_elements(By.CSS_SELECTOR, sel)
+                if imgs:
+                    image = imgs[0].get_attribute("src")
+                    break
         
         item_url = ""
-        links = element.find_elements(By.CSS_SELECTOR, SELECTORS['link'])
+        with TIMINGS.time('field.link'):
+            links = element.find_elements(By.CSS_SELECTOR, SELECTORS['link'])
         if links:
             raw_link = links[0].get_attribute("href")
             if raw_link:
@@ -151,6 +180,66 @@ def parse_product(element, page: int, keyword: str) -> dict:
     except Exception as e:
         return None
 
+def parse_state_products(content: bytes, page: int, keyword: str) -> list:
+    """Map the embedded page-state JSON onto the actor's product dicts (no DOM parsing)"""
+    state = extract_page_state(content)
+    if not state: return []
+
+    products = []
+    scraped_at = datetime.now().isoformat()
+    for value in iter_state_products(state):
+        try:
+            product_id = value.get('id')
+            title = state_get(value, 'titles', 'title')
+            if not product_id or not title: continue
+
+            price = int(state_get(value, 'pricing', 'finalPrice', 'value') or 0)
+            orig_price = int(state_get(value, 'pricing', 'mrp', 'value') or 0) or price
+
+            image = ""
+            images = state_get(value, 'media', 'images') or []
+            if images and isinstance(images[0], dict):
+                image = (images[0].get('url') or "").replace('{@width}', '400') \
+                    .replace('{@height}', '400').replace('{@quality}', '70')
+
+            item_url = value.get('baseUrl') or value.get('smartUrl') or ""
+            if item_url.startswith("/"): item_url = "https://www.flipkart.com" + item_url
+
+            products.append({
+                "itemId": product_id,
+                "name": title,
+                "brand": value.get('productBrand') or state_get(value, 'titles', 'superTitle') or "",
+                "price": price,
+                "originalPrice": orig_price,
+                "ratingScore": float(state_get(value, 'rating', 'average') or 0.0),
+                "image": image,
+                "itemUrl": item_url,
+                "page": page,
+                "keyword": keyword,
+                "scrapedAt": scraped_at
+            })
+        except Exception:
+            continue
+    return products
+
+# =============================
+# Helper: Block Page Detection
+# =============================
+BLOCK_PAGE_MARKERS = (b'captcha', b'are you a human', b'access denied', b'unusual traffic')
+
+def looks_blocked(content: bytes) -> bool:
+    """Bot-wall / captcha page served with a normal status (a real results page is far larger)"""
+    return len(content) < 50_000 and any(marker in content.lower() for marker in BLOCK_PAGE_MARKERS)
+
+def cacheable_page(response: requests.Response) -> bool:
+    """Bot-wall and captcha pages must never be replayed from the HTTP cache"""
+    return not looks_blocked(response.content)
+
+# =============================
+# Helper: Stage Timings
+# =============================
+TIMINGS = StageTimings()  # one per run, shared by every fetch thread
+
 # =============================
 # Core: Fetch One Page (Hybrid)
 # =============================
@@ -163,101 +252,159 @@ def get_selenium_driver(headless=True):
     options.add_argument('--disable-blink-features=AutomationControlled')
     options.add_argument(f'--user-agent={random.choice(USER_AGENTS)}')
     
-    service = Service(ChromeDriverManager().install())
+    service = Service(resolve_chromedriver(Actor.log))
     driver = webdriver.Chrome(service=service, options=options)
     return driver
 
+def page_url(page: int, keyword: str) -> str:
+    return f"{BASE_URL}?q={quote_plus(keyword)}&page={page}"
+
 def fetch_page_hybrid(
     session: requests.Session, 
-    driver_ref: dict, # Pass dict to hold shared driver instance {'driver': None}
+    browser_pool: BrowserPool,
+    limiter: AdaptiveRateLimiter,
     page: int, 
     keyword: str
 ) -> list:
-    
-    url = f"{BASE_URL}?q={quote_plus(keyword)}&page={page}"
+    """Blocking HTTP fetch with Selenium fallback (the async actor uses fetch_page_async)"""
+    limiter.acquire()
+    products, ok = fetch_page_http(session, limiter, page, keyword)
+    if ok: return products
+    limiter.acquire()
+    return products + fetch_page_selenium(browser_pool, limiter, page, keyword)
+
+def fetch_page_http(session: requests.Session, limiter: AdaptiveRateLimiter, page: int, keyword: str) -> tuple:
+    """
+    METHOD 1: fast HTTP fetch + parse. Returns (products, ok); ok is False when the page
+    needs the Selenium fallback (products then holds whatever partial HTTP result there was).
+    The caller paces the request; the response is fed back to the limiter here.
+    """
+    url = page_url(page, keyword)
     Actor.log.info(f"Page {page} → Fetching...")
     
     products = []
     
     # --- METHOD 1: Fast HTTP Requests ---
     try:
-        resp = session.get(url, headers={"User-Agent": random.choice(USER_AGENTS)}, timeout=TIMEOUT)
+        timing_context.timings = TIMINGS
+        start = time.monotonic()
+        try:
+            resp = session.get(url, headers={"User-Agent": random.choice(USER_AGENTS)}, timeout=TIMEOUT)
+        except requests.RequestException:
+            limiter.record(throttled=True)
+            raise
+        elapsed = time.monotonic() - start
+        if getattr(resp, "from_cache", False):
+            TIMINGS.record('http.cache_hit', elapsed)
+        else:
+            # resp.elapsed stops at the response headers (and includes any new-connection setup)
+            ttfb = resp.elapsed.total_seconds()
+            TIMINGS.record('http.ttfb', ttfb)
+            TIMINGS.record('http.download', max(0.0, elapsed - ttfb))
+            limiter.record(resp.status_code, elapsed, looks_blocked(resp.content))
         if resp.status_code == 200:
-            soup = BeautifulSoup(resp.text, "lxml")
+            # Fastest: product data from the embedded page-state JSON
+            with TIMINGS.time('parse.state'):
+                products = parse_state_products(resp.content, page, keyword)
+            if len(products) >= MIN_PRODUCTS_THRESHOLD:
+                Actor.log.info(f"Page {page} → Page-state Success: {len(products)} items")
+                return products, True
+            products = []
+
+            with TIMINGS.time('parse.html'):
+                soup = BeautifulSoup(resp.text, "lxml")
             
             # Standard Container Parsing
-            nodes = soup.select(SELECTORS['product_container'])
+            with TIMINGS.time('parse.container'):
+                nodes = soup.select(SELECTORS['product_container'])
             
             # Fallback: Anchor Parsing (Your optimized logic)
             if len(nodes) < MIN_PRODUCTS_THRESHOLD:
                 Actor.log.info(f"Page {page} → Low HTTP count, trying Anchor Fallback...")
-                anchors = soup.select('a[href*="/p/"], a[href*="pid="]')
-                seen_hrefs = set()
-                for a in anchors:
-                    href = a.get('href')
-                    if href and href not in seen_hrefs:
-                        seen_hrefs.add(href)
-                        # Climb up to find a container-like parent
-                        parent = a.parent
-                        for _ in range(4):
-                            if parent: parent = parent.parent
-                        if parent: nodes.append(parent)
+                with TIMINGS.time('fallback.anchor'):
+                    anchors = soup.select('a[href*="/p/"], a[href*="pid="]')
+                    seen_hrefs = set()
+                    for a in anchors:
+                        href = a.get('href')
+                        if href and href not in seen_hrefs:
+                            seen_hrefs.add(href)
+                            # Climb up to find a container-like parent
+                            parent = a.parent
+                            for _ in range(4):
+                                if parent: parent = parent.parent
+                            if parent: nodes.append(parent)
 
             # Extract
-            for n in nodes:
-                wrapped = SoupElementWrapper(n)
-                p = parse_product(wrapped, page, keyword)
-                if p: products.append(p)
+            with TIMINGS.time('parse.extract'):
+                for n in nodes:
+                    wrapped = SoupElementWrapper(n)
+                    p = parse_product(wrapped, page, keyword)
+                    if p: products.append(p)
                 
             if len(products) >= MIN_PRODUCTS_THRESHOLD:
                 Actor.log.info(f"Page {page} → HTTP Success: {len(products)} items")
-                return products
+                return products, True
     except Exception as e:
         Actor.log.warning(f"Page {page} → HTTP Failed: {e}")
+    return products, False
 
-    # --- METHOD 2: Selenium Fallback ---
+def fetch_page_selenium(browser_pool: BrowserPool, limiter: AdaptiveRateLimiter, page: int, keyword: str) -> list:
+    """METHOD 2: Selenium fallback (blocking; the actor runs it on its browser threads)"""
     Actor.log.info(f"Page {page} → Falling back to Selenium")
-    
-    if driver_ref['driver'] is None:
-        driver_ref['driver'] = get_selenium_driver(headless=True)
-    
-    driver = driver_ref['driver']
-    
+    start = time.perf_counter()
+    try:
+        with browser_pool.acquire() as driver:
+            products = render_page(driver, page, keyword)
+            limiter.record(throttled=not products)
+            return products
+    except Exception as e:
+        Actor.log.error(f"Page {page} → Selenium Failed: {e}")
+        return []
+    finally:
+        TIMINGS.record('fallback.browser', time.perf_counter() - start)
+
+def render_page(driver, page: int, keyword: str) -> list:
+    url = page_url(page, keyword)
+    products = []
     try:
-        driver.get(url)
-        WebDriverWait(driver, TIMEOUT).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, 'body'))
-        )
+        with TIMINGS.time('browser.load'):
+            driver.get(url)
+            WebDriverWait(driver, TIMEOUT).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, 'body'))
+            )
         
         # Smart Scroll
-        last_height = driver.execute_script("return document.body.scrollHeight")
-        for _ in range(3):
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(1)
-            new_height = driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height: break
-            last_height = new_height
+        with TIMINGS.time('browser.scroll'):
+            last_height = driver.execute_script("return document.body.scrollHeight")
+            for _ in range(3):
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                time.sleep(1)
+                new_height = driver.execute_script("return document.body.scrollHeight")
+                if new_height == last_height: break
+                last_height = new_height
             
         elements = driver.find_elements(By.CSS_SELECTOR, SELECTORS['product_container'])
         
         # Selenium Anchor Fallback
         if len(elements) < MIN_PRODUCTS_THRESHOLD:
-            anchors = driver.find_elements(By.CSS_SELECTOR, 'a[href*="/p/"]')
-            for a in anchors:
-                try:
-                    # XPath to get ancestor
-                    ancestor = a.find_element(By.XPATH, "./ancestor::div[4]")
-                    elements.append(ancestor)
-                except: pass
+            with TIMINGS.time('fallback.browser_anchor'):
+                anchors = driver.find_elements(By.CSS_SELECTOR, 'a[href*="/p/"]')
+                for a in anchors:
+                    try:
+                        # XPath to get ancestor
+                        ancestor = a.find_element(By.XPATH, "./ancestor::div[4]")
+                        elements.append(ancestor)
+                    except: pass
 
         seen_ids = set()
-        for el in elements:
-            try:
-                p = parse_product(el, page, keyword)
-                if p and p['itemId'] not in seen_ids:
-                    seen_ids.add(p['itemId'])
-                    products.append(p)
-            except: continue
+        with TIMINGS.time('browser.extract'):
+            for el in elements:
+                try:
+                    p = parse_product(el, page, keyword)
+                    if p and p['itemId'] not in seen_ids:
+                        seen_ids.add(p['itemId'])
+                        products.append(p)
+                except: continue
             
         Actor.log.info(f"Page {page} → Selenium Success: {len(products)} items")
         return products
@@ -266,6 +413,96 @@ def fetch_page_hybrid(
         Actor.log.error(f"Page {page} → Selenium Failed: {e}")
         return []
 
+# =============================
+# Async Fetch Layer
+# =============================
+async def fetch_page_async(
+    session: requests.Session,
+    browser_pool: BrowserPool,
+    limiter: AdaptiveRateLimiter,
+    page: int,
+    keyword: str,
+    http_slots: asyncio.Semaphore,
+    browser_executor: ThreadPoolExecutor
+) -> list:
+    """
+    Event-loop friendly fetch_page_hybrid. The pooled requests session runs in the default
+    executor under the http_slots limit, waits for a rate-limiter token are asyncio.sleeps, and the
+    blocking Selenium fallback runs on browser_executor (one thread per pooled driver, so
+    rendered pages proceed in parallel without sharing a driver).
+    """
+    loop = asyncio.get_running_loop()
+    async with http_slots:
+        # Rate limiting: wait for a token without blocking the loop
+        await asyncio.sleep(limiter.reserve())
+        products, ok = await loop.run_in_executor(None, fetch_page_http, session, limiter, page, keyword)
+    if ok: return products
+    await asyncio.sleep(limiter.reserve())
+    return products + await loop.run_in_executor(browser_executor, fetch_page_selenium, browser_pool, limiter, page, keyword)
+
+# =============================
+# Buffered Dataset Writer
+# =============================
+class BufferedDatasetWriter:
+    """
+    Batches Actor.push_data calls. A flush is triggered by size (batch_size items) or age
+    (interval seconds, also checked by a background ticker) and runs as a task, so fetching
+    continues while it uploads. At most one push is in flight, so memory stays bounded by
+    one buffer plus one batch and the dataset keeps page order.
+    """
+    def __init__(self, batch_size: int = PUSH_BATCH_SIZE, interval: float = PUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.total = 0
+        self._buffer: list = []
+        self._oldest: Optional[float] = None
+        self._inflight: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._ticker: Optional[asyncio.Task] = None
+
+    async def __aenter__(self):
+        self._ticker = asyncio.create_task(self._tick())
+        return self
+
+    async def __aexit__(self, *exc):
+        self._ticker.cancel()
+        await asyncio.gather(self._ticker, return_exceptions=True)
+        await self.flush(wait=True)
+
+    async def add(self, items: list):
+        if not items: return
+        if self._oldest is None: self._oldest = time.monotonic()
+        self._buffer.extend(items)
+        self.total += len(items)
+        if len(self._buffer) >= self.batch_size or self._expired():
+            await self.flush()
+
+    def _expired(self) -> bool:
+        return self._oldest is not None and time.monotonic() - self._oldest >= self.interval
+
+    async def _tick(self):
+        while True:
+            await asyncio.sleep(self.interval / 2)
+            if self._expired():
+                await self.flush()
+
+    async def _push(self, batch: list):
+        with TIMINGS.time('save.push'):
+            await Actor.push_data(batch)
+
+    async def flush(self, wait: bool = False):
+        async with self._lock:
+            if self._inflight:
+                # previous batch must land first (ordering + bounded memory); surfaces push errors
+                await self._inflight
+                self._inflight = None
+            if self._buffer:
+                batch, self._buffer, self._oldest = self._buffer, [], None
+                self._inflight = asyncio.create_task(self._push(batch))
+            if wait and self._inflight:
+                await self._inflight
+                self._inflight = None
+
 # =============================
 # Main Actor
 # =============================
@@ -280,38 +517,82 @@ async def main() -> None:
             return
 
         max_pages = int(input_data.get("max_pages", 5))
+        concurrency = max(1, int(input_data.get("max_concurrency", MAX_CONCURRENCY)))
+        pool_size = max(1, int(input_data.get("browser_pool_size", BROWSER_POOL_SIZE)))
+        use_cache = bool(input_data.get("http_cache", True))
+        dedup_across_pages = bool(input_data.get("dedup_across_pages", DEDUP_ACROSS_PAGES))
+        dedup_backend = input_data.get("dedup_backend", DEDUP_BACKEND)
+        if dedup_backend not in ("exact", "bloom"):
+            await Actor.fail(f"dedup_backend must be 'exact' or 'bloom', got {dedup_backend!r}")
+            return
+        dedup_error_rate = float(input_data.get("dedup_error_rate", DEDUP_ERROR_RATE))
         
-        Actor.log.info(f"Starting Flipkart Scraper: '{keyword}' | Max Pages: {max_pages}")
+        Actor.log.info(f"Starting Flipkart Scraper: '{keyword}' | Max Pages: {max_pages} | Concurrency: {concurrency}")
 
         # Shared Resources
         session = requests.Session()
-        driver_ref = {'driver': None} # Mutable container for lazy driver
+        if use_cache:
+            cache = HttpCache(HTTP_CACHE_DIR, HTTP_CACHE_TTL, HTTP_CACHE_MAX_MB * 1024 * 1024)
+            adapter = CachingAdapter(cache, storable=cacheable_page, pool_maxsize=max(10, concurrency))
+        else:
+            adapter = HTTPAdapter(pool_maxsize=max(10, concurrency))
+        session.mount("https://", time_connections(adapter))
+        # drivers start lazily on first fallback
+        browser_pool = BrowserPool(get_selenium_driver, size=pool_size,
+                                   recycle_after=BROWSER_RECYCLE_AFTER, log=Actor.log)
+        http_slots = asyncio.Semaphore(concurrency)
+        limiter = AdaptiveRateLimiter(RATE_INITIAL, RATE_MIN, RATE_MAX, RATE_INCREASE, RATE_DECREASE,
+                                      log=Actor.log)
+        browser_executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="selenium")
         
-        total_products = 0
-        all_products = []
+        page = 0
+        # products are deduped within each page; across pages only when asked to
+        seen_ids = new_seen_ids(dedup_backend, DEDUP_INITIAL_CAPACITY, dedup_error_rate) if dedup_across_pages else None
 
+        def schedule(p: int) -> asyncio.Task:
+            return asyncio.create_task(
+                fetch_page_async(session, browser_pool, limiter, p, keyword, http_slots, browser_executor)
+            )
+
+        # Prefetch window: page N+1.. download while page N is parsed and pushed
+        tasks = {p: schedule(p) for p in range(1, min(concurrency, max_pages) + 1)}
+        next_page = len(tasks) + 1
+
+        writer = BufferedDatasetWriter()
         try:
-            for page in range(1, max_pages + 1):
-                # We run the synchronous hybrid fetcher
-                products = fetch_page_hybrid(session, driver_ref, page, keyword)
-                
-                if products:
-                    await Actor.push_data(products)
-                    total_products += len(products)
-                    all_products.extend(products)
-                else:
-                    Actor.log.warning(f"Page {page} returned 0 items. Stopping.")
-                    break
+            async with writer:
+                for page in range(1, max_pages + 1):
+                    products = await tasks.pop(page)
+                    if next_page <= max_pages:
+                        tasks[next_page] = schedule(next_page)
+                        next_page += 1
                     
-                # Rate Limiting
-                time.sleep(random.uniform(1, 2))
+                    if products:
+                        if seen_ids is not None:
+                            # a product repeated on a later page is pushed once
+                            fresh = []
+                            for p in products:
+                                if p['itemId'] not in seen_ids:
+                                    seen_ids.add(p['itemId'])
+                                    fresh.append(p)
+                            products = fresh
+                        await writer.add(products)
+                    else:
+                        Actor.log.warning(f"Page {page} returned 0 items. Stopping.")
+                        break
                 
         finally:
-            # Cleanup
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+            # Cleanup (drivers are quit off the event loop)
+            await asyncio.get_running_loop().run_in_executor(None, browser_pool.close)
+            Actor.log.info("Drivers closed.")
+            browser_executor.shutdown(wait=False)
             session.close()
-            if driver_ref['driver']:
-                driver_ref['driver'].quit()
-                Actor.log.info("Driver closed.")
+
+        total_products = writer.total
 
         # === FINAL OUTPUT ===
         await Actor.set_value("OUTPUT", {
@@ -320,8 +601,13 @@ async def main() -> None:
             "keyword": keyword,
             "pagesScraped": page
         })
+        await Actor.set_value("TIMINGS", {
+            "summary": TIMINGS.summary(),
+            "histograms": TIMINGS.histograms()
+        })
         
         Actor.log.info(f"DONE. Scraped {total_products} products.")
+        Actor.log.info("Stage timings (ms):\n" + TIMINGS.report())
 
 # =============================
 # Run
@@ -0,0 +1,1301 @@
+"""
+Helpers shared by the Flipkart scrapers and the actor: the product model, chromedriver
+resolution, streaming output and resume checkpoints, dedup (Bloom filter and the
+persistent index), the adaptive rate limiter, the HTTP response cache and stage timings.
+Import from here rather than copying; every script keeps only its own scraping logic.
+"""
+
+import gzip
+import hashlib
+import heapq
+import json
+import logging
+import math
+import os
+import queue
+import random
+import re
+import sqlite3
+import subprocess
+import threading
+import time
+import zlib
+import functools
+import argparse
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# ==================== DATA MODELS ====================
+
+_encode_str = json.encoder.encode_basestring  # C-accelerated; leaves non-ASCII as is, like ensure_ascii=False
+
+class FlipkartProduct:
+    """Validated product data model"""
+    # No per-instance __dict__; held products still read like dicts (p['price'], p.get('brand'))
+    __slots__ = ('title', 'product_id', 'price', 'original_price', 'discount', 'rating',
+                 'rating_count', 'brand', 'product_url', 'in_stock', 'thumbnail',
+                 'page_number', 'timestamp')
+
+    def __init__(self, **kwargs):
+        self.title: str = kwargs.get('title', '').strip()
+        self.product_id: str = str(kwargs.get('product_id', ''))
+        self.price: int = int(kwargs.get('price') or 0)
+        self.original_price: int = int(kwargs.get('original_price') or 0)
+        self.discount: int = int(kwargs.get('discount') or 0)
+        self.rating: float = float(kwargs.get('rating') or 0.0)
+        self.rating_count: int = int(kwargs.get('rating_count') or 0)
+        self.brand: str = (kwargs.get('brand') or '').strip()
+        self.product_url: str = kwargs.get('product_url') or ''
+        self.in_stock: bool = bool(kwargs.get('in_stock', True))
+        self.thumbnail: str = kwargs.get('thumbnail') or ''
+        self.page_number: int = int(kwargs.get('page_number') or 0)
+        # set once per page, shared by all of its products, when the page is collected
+        self.timestamp: str = kwargs.get('timestamp', '')
+    
+    def is_valid(self) -> bool:
+        """Validate essential fields"""
+        return bool(self.title and self.product_id and self.price > 0)
+    
+    def content_hash(self) -> bytes:
+        """Digest of the listing content for cross-run change detection (ignores page/time and URL tracking params)"""
+        content = (self.title, self.price, self.original_price, self.discount, self.rating,
+                   self.rating_count, self.brand, self.product_url.split('?', 1)[0],
+                   self.in_stock, self.thumbnail)
+        return hashlib.blake2b('\x1f'.join(map(str, content)).encode('utf-8'), digest_size=16).digest()
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.__slots__ else default
+    
+    def keys(self) -> tuple:
+        return self.__slots__
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+    
+    def to_json(self) -> str:
+        """Same text as json.dumps(self.to_dict(), ensure_ascii=False), without the dict"""
+        return (f'{{"title": {_encode_str(self.title)}, "product_id": {_encode_str(self.product_id)}, '
+                f'"price": {self.price}, "original_price": {self.original_price}, '
+                f'"discount": {self.discount}, "rating": {self.rating!r}, '
+                f'"rating_count": {self.rating_count}, "brand": {_encode_str(self.brand)}, '
+                f'"product_url": {_encode_str(self.product_url)}, '
+                f'"in_stock": {"true" if self.in_stock else "false"}, '
+                f'"thumbnail": {_encode_str(self.thumbnail)}, "page_number": {self.page_number}, '
+                f'"timestamp": {_encode_str(self.timestamp)}}}')
+
+def stable_id(prefix: str, text: str) -> str:
+    """Fallback product id derived from text; unlike hash() it is the same in every process"""
+    return f"{prefix}_{hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()}"
+
+# ==================== PAGE STATE ====================
+
+# Search pages embed their product data as `window.__INITIAL_STATE__ = {...};` in a script tag
+PAGE_STATE_MARKER = b'window.__INITIAL_STATE__'
+
+def extract_page_state(content: bytes) -> Optional[Dict[str, Any]]:
+    """Locate the page-state blob with a byte scan and JSON-decode only that slice."""
+    start = content.find(PAGE_STATE_MARKER)
+    if start < 0:
+        return None
+    start = content.find(b'{', start + len(PAGE_STATE_MARKER))
+    if start < 0:
+        return None
+    # a JSON literal inside a script tag cannot contain a raw </script>
+    end = content.find(b'</script>', start)
+    blob = content[start:end] if end > 0 else content[start:]
+    try:
+        state, _ = json.JSONDecoder().raw_decode(blob.decode('utf-8', errors='replace'))
+    except ValueError:
+        return None
+    return state if isinstance(state, dict) else None
+
+def iter_state_products(state: Dict[str, Any]):
+    """Yield product value dicts (`productInfo.value`) in page order (page state or page-fetch JSON)."""
+    root = state.get('pageDataV4', {}).get('page', {}).get('data') or state
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            info = node.get('productInfo')
+            if isinstance(info, dict) and isinstance(info.get('value'), dict):
+                yield info['value']
+                continue
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+def state_get(node: Any, *path: str) -> Any:
+    """Nested dict lookup that returns None on any missing key."""
+    for key in path:
+        if not isinstance(node, dict):
+            return None
+        node = node.get(key)
+    return node
+
+# ==================== DRIVER RESOLUTION ====================
+
+DRIVER_CACHE_FILE = Path.home() / ".wdm" / "flipkart_chromedriver.json"
+CHROME_BINARIES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser")
+
+def _chrome_major_version() -> Optional[str]:
+    """Major version of the installed Chrome/Chromium, or None if it can't be detected"""
+    for binary in CHROME_BINARIES:
+        try:
+            out = subprocess.run([binary, "--version"], capture_output=True, text=True, timeout=5).stdout
+        except (OSError, subprocess.SubprocessError):
+            continue
+        match = re.search(r'(\d+)\.\d+', out)
+        if match:
+            return match.group(1)
+    try:
+        # Windows/macOS registry and app-bundle lookups
+        from webdriver_manager.core.os_manager import OperationSystemManager, ChromeType
+        version = OperationSystemManager().get_browser_version_from_os(ChromeType.GOOGLE)
+        return version.split('.')[0] if version else None
+    except Exception:
+        return None
+
+@functools.lru_cache(maxsize=1)
+def resolve_chromedriver(log: Optional[logging.Logger] = None) -> str:
+    """
+    Path to a chromedriver matching the installed Chrome. The path resolved by
+    ChromeDriverManager is cached on disk together with the Chrome major version, so later
+    runs skip the manager (and its network lookups) until Chrome is upgraded or the cached
+    binary disappears. Resolved once per process.
+    """
+    log = log or logger
+    major = _chrome_major_version()
+    try:
+        cached = json.loads(DRIVER_CACHE_FILE.read_text(encoding='utf-8'))
+        if Path(cached['path']).is_file() and (major is None or cached.get('chrome_major') == major):
+            log.debug(f"⚡ Cached chromedriver: {cached['path']}")
+            return cached['path']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    from webdriver_manager.chrome import ChromeDriverManager  # selenium scripts only
+
+    path = ChromeDriverManager().install()
+    try:
+        DRIVER_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        DRIVER_CACHE_FILE.write_text(json.dumps({
+            'path': path,
+            'chrome_major': major,
+            'resolved_at': datetime.now().isoformat()
+        }), encoding='utf-8')
+    except OSError as e:
+        log.warning(f"⚠️ Could not write driver cache: {e}")
+    return path
+
+# ==================== BROWSER POOL ====================
+
+class BrowserPool:
+    """
+    Pool of up to `size` browser drivers for the rendering fallback; `factory` starts one.
+
+    Drivers are created on demand; the first checkout also pre-warms the rest of the pool
+    in background threads so later fallbacks don't pay browser start-up. Every checkout is
+    health-checked (a dead driver is replaced), and a driver is recycled after
+    `recycle_after` rendered pages to keep Chrome memory growth in check.
+    """
+    def __init__(self, factory: Callable[[], Any], size: int = 1, recycle_after: int = 50,
+                 log: Optional[logging.Logger] = None):
+        self.factory = factory
+        self.size = max(1, size)
+        self.recycle_after = recycle_after
+        self._idle: "queue.Queue" = queue.Queue()
+        self._uses: Dict[int, int] = {}
+        self._drivers: List[Any] = []
+        self._slots = 0  # drivers alive or being started
+        self._lock = threading.Lock()
+        self._warmed = False
+        self.log = log or logger
+
+    def _reserve(self) -> bool:
+        with self._lock:
+            if self._slots >= self.size:
+                return False
+            self._slots += 1
+            return True
+
+    def _spawn(self):
+        """Start a driver for an already reserved slot (slot is released on failure)."""
+        try:
+            driver = self.factory()
+        except Exception:
+            with self._lock:
+                self._slots -= 1
+            raise
+        with self._lock:
+            self._drivers.append(driver)
+            self._uses[id(driver)] = 0
+        return driver
+
+    def _discard(self, driver):
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+                self._slots -= 1
+            self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _warm(self):
+        def start():
+            try:
+                self._idle.put(self._spawn())
+            except Exception as e:
+                self.log.warning(f"Browser pre-warm failed: {e}")
+
+        while self._reserve():
+            threading.Thread(target=start, daemon=True).start()
+
+    @staticmethod
+    def _healthy(driver) -> bool:
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _checkout(self):
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = self._spawn() if self._reserve() else None
+                if not self._warmed:
+                    self._warmed = True
+                    self._warm()
+                if driver is None:
+                    try:
+                        driver = self._idle.get(timeout=1)
+                    except queue.Empty:
+                        continue
+            if self._healthy(driver):
+                return driver
+            self.log.warning("♻️ Unhealthy browser replaced")
+            self._discard(driver)
+
+    def _checkin(self, driver):
+        with self._lock:
+            self._uses[id(driver)] = self._uses.get(id(driver), 0) + 1
+            worn_out = self._uses[id(driver)] >= self.recycle_after
+        if worn_out:
+            self.log.info("♻️ Recycling browser")
+            self._discard(driver)
+        else:
+            self._idle.put(driver)
+
+    @contextmanager
+    def acquire(self):
+        """Borrow a healthy driver for one page render."""
+        driver = self._checkout()
+        try:
+            yield driver
+        finally:
+            self._checkin(driver)
+
+    def close(self):
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+            self._slots = 0
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+# ==================== STREAMING OUTPUT ====================
+
+class JsonlWriter:
+    """
+    Append-only JSON Lines output: one record per line, written as it arrives, so memory
+    doesn't grow with the result count and there is no big dump at the end. Data is
+    flushed and fsync'd every fsync_every lines or fsync_seconds, whichever comes first.
+    compression='gzip' or 'zstd' (needs the zstandard package) wraps the stream; every
+    sync flushes a complete compressed block, so a crash loses at most the unsynced lines.
+    A new writer replaces an existing file; pass the checkpoint offset to continue one.
+    """
+    SUFFIXES = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+    def __init__(self, path: str, compression: Optional[str] = None,
+                 fsync_every: int = 200, fsync_seconds: float = 5.0,
+                 offset: Optional[int] = None, lines: int = 0):
+        if compression not in self.SUFFIXES:
+            raise ValueError(f"Unknown output compression: {compression}")
+        self.path = Path(path)
+        self.compression = compression
+        self.fsync_every = max(1, fsync_every)
+        self.fsync_seconds = fsync_seconds
+        self.lines = lines
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        if offset is None:
+            self._raw = open(self.path, 'wb')
+        else:
+            # resuming: drop whatever was written after the last checkpoint
+            self._raw = open(self.path, 'ab')
+            self._raw.truncate(offset)
+        self._stream = None
+
+    def _open_stream(self):
+        if self.compression == 'gzip':
+            return gzip.GzipFile(fileobj=self._raw, mode='ab')
+        if self.compression == 'zstd':
+            import zstandard  # optional, only needed for .zst output
+            return zstandard.ZstdCompressor().stream_writer(self._raw, closefd=False)
+        return self._raw
+
+    def write(self, record: Dict[str, Any]):
+        if self._stream is None:
+            self._stream = self._open_stream()
+        if isinstance(record, FlipkartProduct):
+            line = record.to_json()
+        else:
+            line = json.dumps(record, ensure_ascii=False)
+        self._stream.write(line.encode('utf-8') + b'\n')
+        self.lines += 1
+        self._unsynced += 1
+        if (self._unsynced >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_seconds):
+            self.sync()
+
+    def write_many(self, records: List[Dict[str, Any]]):
+        for record in records:
+            self.write(record)
+
+    def sync(self):
+        """Flush buffered (and compressed) data through to disk"""
+        if self._stream is not None and self._stream is not self._raw:
+            self._stream.flush()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _end_stream(self):
+        if self._stream is not None and self._stream is not self._raw:
+            self._stream.close()  # gzip trailer / end of zstd frame; leaves _raw open
+        self._stream = None
+
+    def checkpoint(self) -> int:
+        """
+        Sync and return the byte offset of everything written so far. A compressed stream
+        ends its gzip member / zstd frame here (the next write starts a new one, and
+        concatenated members decode as one stream), so the file up to the offset is always
+        complete and a resumed run can truncate back to it and append.
+        """
+        self._end_stream()
+        self.sync()
+        return self._raw.tell()
+
+    def close(self):
+        if self._raw.closed:
+            return
+        self._end_stream()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._raw.close()
+
+class RunSummary:
+    """
+    Running aggregates of a run's products (count, stock, price range and averages, brands,
+    top deals) for the end-of-run summary, so a JSONL run can stream its products to disk
+    instead of holding them all until the end.
+    """
+    TOP = 10
+
+    def __init__(self):
+        self.count = 0
+        self.in_stock = 0
+        self.price_total = 0
+        self.price_min = 0
+        self.price_max = 0
+        self.discount_total = 0
+        self.brands = set()
+        self._top: List[tuple] = []  # min-heap of (discount, -arrival, product)
+
+    def add(self, product):
+        self.count += 1
+        price, discount = product.get('price', 0), product.get('discount', 0)
+        self.in_stock += bool(product.get('in_stock'))
+        self.price_total += price
+        self.price_min = price if self.count == 1 else min(self.price_min, price)
+        self.price_max = max(self.price_max, price)
+        self.discount_total += discount
+        if product.get('brand'):
+            self.brands.add(product.get('brand'))
+        # on equal discounts the earlier product ranks higher, as with a stable sort
+        entry = (discount, -self.count, product)
+        if len(self._top) < self.TOP:
+            heapq.heappush(self._top, entry)
+        elif entry[:2] > self._top[0][:2]:
+            heapq.heapreplace(self._top, entry)
+
+    def add_many(self, products):
+        for product in products:
+            self.add(product)
+
+    @property
+    def avg_price(self) -> float:
+        return self.price_total / self.count if self.count else 0
+
+    @property
+    def avg_discount(self) -> float:
+        return self.discount_total / self.count if self.count else 0
+
+    def top_deals(self) -> List[Any]:
+        """Highest discounts first"""
+        return [product for *_, product in sorted(self._top, reverse=True)]
+
+    def to_state(self) -> Dict[str, Any]:
+        """JSON-safe snapshot (for resumable checkpoints); bounded by the brand count"""
+        state = {name: getattr(self, name) for name in
+                 ('count', 'in_stock', 'price_total', 'price_min', 'price_max', 'discount_total')}
+        state['brands'] = sorted(self.brands)
+        state['top'] = [[discount, order, dict(product)] for discount, order, product in self._top]
+        return state
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "RunSummary":
+        summary = cls()
+        for name in ('count', 'in_stock', 'price_total', 'price_min', 'price_max', 'discount_total'):
+            setattr(summary, name, state[name])
+        summary.brands = set(state['brands'])
+        summary._top = [tuple(entry) for entry in state['top']]
+        heapq.heapify(summary._top)
+        return summary
+
+# ==================== RESUME STATE ====================
+
+def load_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    """State of the last interrupted run, or None if there is none"""
+    try:
+        return json.loads(Path(path).read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Unreadable checkpoint {path}: {e}")
+        return None
+
+def write_checkpoint(path: str, state: Dict[str, Any]):
+    """Atomically replace the checkpoint file"""
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+class IdJournal:
+    """
+    Append-only log of the product ids a run has streamed, one per line, kept next to the
+    checkpoint. A checkpoint syncs only the ids added since the previous one and records
+    the synced length, so its cost stays flat however long the run gets; resuming replays
+    the log up to that length into the dedup filter.
+    """
+    def __init__(self, path: str, offset: Optional[int] = None):
+        self.path = Path(path)
+        if offset is None or not self.path.exists():
+            self.file = open(self.path, 'wb')
+        else:
+            # ids past the checkpoint belong to output lines that are cut on resume too
+            self.file = open(self.path, 'r+b')
+            self.file.truncate(offset)
+            self.file.seek(offset)
+        self.pending: List[str] = []
+
+    @staticmethod
+    def read(path: str, offset: int) -> List[str]:
+        """Ids recorded up to offset"""
+        try:
+            with open(path, 'rb') as f:
+                return f.read(offset).decode('utf-8').splitlines()
+        except FileNotFoundError:
+            logger.warning(f"⚠️ Missing id journal {path}, already saved products may repeat")
+            return []
+
+    def add_many(self, ids):
+        self.pending.extend(ids)
+
+    def sync(self) -> int:
+        """Append and fsync the pending ids; returns the durable length"""
+        if self.pending:
+            self.file.write(''.join(f"{i}\n" for i in self.pending).encode('utf-8'))
+            self.pending.clear()
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+# ==================== DEDUP FILTER ====================
+
+def _bloom_hashes(key: str) -> tuple:
+    """Two 64-bit hashes of the key; a filter derives its k bit positions as h1 + i*h2"""
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+class BloomFilter:
+    """Fixed-size Bloom filter sized for capacity keys at error_rate"""
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(64, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def contains(self, h1: int, h2: int) -> bool:
+        bits, size = self.bits, self.size
+        for i in range(self.hashes):
+            p = (h1 + i * h2) % size
+            if not bits[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+    def add(self, h1: int, h2: int):
+        bits, size = self.bits, self.size
+        for i in range(self.hashes):
+            p = (h1 + i * h2) % size
+            bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+class ScalableBloomFilter:
+    """
+    Set-like id dedup in about 1.44*log2(1/error_rate) bits per id instead of a Python
+    string each. When the newest filter is full another one GROWTH times larger is added
+    with TIGHTENING times the error rate, so the combined false-positive rate stays below
+    error_rate however many ids arrive. A false positive makes a new id read as seen
+    (the product is dropped); there are no false negatives. Supports in, add, update, len.
+    """
+    GROWTH = 2
+    TIGHTENING = 0.5
+
+    def __init__(self, initial_capacity: int = 100_000, error_rate: float = 0.001):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.filters: List[BloomFilter] = []
+        self._count = 0
+
+    def _new_filter(self, n: int) -> BloomFilter:
+        # error rates form a geometric series summing to error_rate
+        return BloomFilter(self.initial_capacity * self.GROWTH ** n,
+                           self.error_rate * (1 - self.TIGHTENING) * self.TIGHTENING ** n)
+
+    def __contains__(self, key: str) -> bool:
+        h1, h2 = _bloom_hashes(key)
+        return any(f.contains(h1, h2) for f in self.filters)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, key: str):
+        h1, h2 = _bloom_hashes(key)
+        if any(f.contains(h1, h2) for f in self.filters):
+            return
+        if not self.filters or self.filters[-1].count >= self.filters[-1].capacity:
+            self.filters.append(self._new_filter(len(self.filters)))
+        self.filters[-1].add(h1, h2)
+        self._count += 1
+
+    def update(self, keys):
+        for key in keys:
+            self.add(key)
+
+def new_seen_ids(backend: str, initial_capacity: int = 100_000, error_rate: float = 0.001):
+    """Dedup container for product ids: 'exact' is a set, 'bloom' a ScalableBloomFilter"""
+    if backend == 'exact':
+        return set()
+    if backend == 'bloom':
+        return ScalableBloomFilter(initial_capacity, error_rate)
+    raise ValueError(f"Unknown dedup backend: {backend}")
+
+# ==================== DEDUP INDEX ====================
+
+class SeenIndex:
+    """
+    Persistent product_id -> content hash index in SQLite, so a run only emits products
+    that are new or changed since earlier runs. mode='preload' reads the table into a dict
+    at startup (O(1) lookups after one SELECT); mode='mmap' memory-maps the database file
+    and does a primary-key lookup per product instead, for indexes too big to preload.
+    Changes are buffered in memory and written by flush().
+    """
+    def __init__(self, path: str, mode: str = 'preload', mmap_mb: int = 256):
+        if mode not in ('preload', 'mmap'):
+            raise ValueError(f"Unknown dedup index mode: {mode}")
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen (product_id TEXT PRIMARY KEY, "
+            "content_hash BLOB NOT NULL, updated TEXT NOT NULL) WITHOUT ROWID"
+        )
+        self._hashes: Optional[Dict[str, bytes]] = None
+        if mode == 'preload':
+            self._hashes = dict(self.conn.execute("SELECT product_id, content_hash FROM seen"))
+        else:
+            self.conn.execute(f"PRAGMA mmap_size={mmap_mb * 1024 * 1024}")
+        self._pending: Dict[str, bytes] = {}
+
+    def _stored(self, product_id: str) -> Optional[bytes]:
+        if self._hashes is not None:
+            return self._hashes.get(product_id)
+        if product_id in self._pending:
+            return self._pending[product_id]
+        row = self.conn.execute("SELECT content_hash FROM seen WHERE product_id = ?", (product_id,)).fetchone()
+        return row[0] if row else None
+
+    def update(self, product: FlipkartProduct) -> bool:
+        """Record the product; True if it is new or its content changed"""
+        digest = product.content_hash()
+        if self._stored(product.product_id) == digest:
+            return False
+        self._pending[product.product_id] = digest
+        if self._hashes is not None:
+            self._hashes[product.product_id] = digest
+        return True
+
+    def new_or_changed(self, products: List[Any]) -> List[Any]:
+        """Record every product and keep those that are new or changed (non-products pass through)"""
+        return [p for p in products if not isinstance(p, FlipkartProduct) or self.update(p)]
+
+    def flush(self):
+        if not self._pending:
+            return
+        updated = datetime.now().isoformat()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO seen VALUES (?, ?, ?)",
+                ((product_id, digest, updated) for product_id, digest in self._pending.items())
+            )
+        self._pending.clear()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+# ==================== RESUMABLE OUTPUT ====================
+
+class ResumableOutputMixin:
+    """
+    JSONL output and resume plumbing shared by the search scrapers. The host class sets
+    config, stats, seen_ids, summary, output, id_journal, dedup_index and _run in
+    __init__; a search calls _resume_checkpoint first, _collect_products once per merged
+    page, _write_resume_state from its checkpoints and _finish_output from save_results.
+    """
+    SCRAPER_VERSION = "2.0.0"  # written to the run metadata
+
+    def _resume_checkpoint(self, query: str, max_pages: int) -> Set[int]:
+        """
+        Start the resumable state for a search. With config.resume and a checkpoint for the
+        same query, restore the dedup set, stats and output stream (cut back to the last
+        checkpoint) and return the pages that are already done.
+        """
+        self._run = {"query": query, "max_pages": max_pages, "pages": [], "complete": False}
+        self.summary = RunSummary()
+        state = load_checkpoint(self.config.checkpoint_file) if self.config.resume else None
+        if state and state.get('query') != query:
+            logger.warning(f"⚠️ Checkpoint is for '{state.get('query')}', starting '{query}' from page 1")
+            state = None
+        if not state:
+            self._open_id_journal()
+            return set()
+
+        self._run.update(pages=state['pages'], complete=state['complete'])
+        self.seen_ids.update(IdJournal.read(f"{self.config.checkpoint_file}.ids", state['ids_offset']))
+        self._open_id_journal(state['ids_offset'])
+        self.stats.update(state['stats'])
+        self.summary = RunSummary.from_state(state['summary'])
+        if state['output_file']:
+            self.output = JsonlWriter(state['output_file'], state['compression'],
+                                      self.config.fsync_every, self.config.fsync_seconds,
+                                      offset=state['offset'], lines=state['lines'])
+        logger.info(f"♻️ Resuming '{query}': {len(state['pages'])} pages done, "
+                    f"{state['lines']} products already saved")
+        if state['complete']:
+            return set(range(1, max_pages + 1))
+        return set(state['pages'])
+
+    def _open_id_journal(self, offset: Optional[int] = None):
+        """Start the id log behind the checkpoint's dedup state (JSONL runs only)"""
+        if self.id_journal:
+            self.id_journal.close()
+            self.id_journal = None
+        if self.config.output_format == 'jsonl':
+            self.id_journal = IdJournal(f"{self.config.checkpoint_file}.ids", offset)
+
+    def _write_resume_state(self):
+        """Make the output durable and record where a resumed run should pick up"""
+        output = self.output
+        state = dict(
+            self._run,
+            stats=self.stats,
+            summary=self.summary.to_state(),
+            dedup_index_file=self.config.dedup_index_file,
+            output_file=str(output.path) if output else None,
+            compression=output.compression if output else self.config.output_compression,
+            offset=output.checkpoint() if output else 0,
+            lines=output.lines if output else 0,
+            ids_offset=self.id_journal.sync(),
+            timestamp=datetime.now().isoformat()
+        )
+        write_checkpoint(self.config.checkpoint_file, state)
+        # after the output offset: a crash in between only means re-emitting on the next run
+        if self.dedup_index:
+            self.dedup_index.flush()
+
+    def _new_or_changed(self, products: List[FlipkartProduct]) -> List[FlipkartProduct]:
+        """Drop products the dedup index already holds with the same content"""
+        if not self.dedup_index:
+            return products
+        fresh = self.dedup_index.new_or_changed(products)
+        self.stats['products_unchanged'] += len(products) - len(fresh)
+        return fresh
+
+    def _open_output(self, query: str, filename: Optional[str] = None) -> JsonlWriter:
+        """JSONL stream for this search, opened on first use"""
+        if self.output is None:
+            if not filename:
+                filename = self.config.output_file
+            if not filename:
+                safe_query = re.sub(r'[^\w]', '_', query)
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                filename = (f"flipkart_{safe_query}_{timestamp}.jsonl"
+                            + JsonlWriter.SUFFIXES[self.config.output_compression])
+            self.output = JsonlWriter(filename, self.config.output_compression,
+                                      self.config.fsync_every, self.config.fsync_seconds)
+            logger.info(f"💾 Streaming results to {self.output.path}")
+        return self.output
+
+    def _collect_products(self, query: str, products: List[FlipkartProduct],
+                          all_products: List[FlipkartProduct]):
+        """Count a page's products into the run summary, then stream (JSONL) or hold (JSON) them"""
+        self.summary.add_many(products)
+        if self.config.output_format == 'jsonl':
+            self._stream_products(query, products)
+        else:
+            all_products.extend(products)
+
+    def _stream_products(self, query: str, products: List[Dict]):
+        """Append a page's products to the JSONL output as soon as they are merged"""
+        if self.config.output_format == 'jsonl':
+            if self.id_journal:
+                self.id_journal.add_many(p.product_id for p in products)
+            products = self._new_or_changed(products)
+            if products:
+                self._open_output(query).write_many(products)
+
+    def _output_metadata(self, output: JsonlWriter, query: str) -> Dict[str, Any]:
+        """Contents of the .meta.json written next to a finished JSONL file"""
+        return {
+            "query": query,
+            "total": output.lines,
+            "scraped": self.summary.count,
+            "unique": len(self.seen_ids),
+            "stats": self.stats,
+            "timestamp": datetime.now().isoformat(),
+            "scraper_version": self.SCRAPER_VERSION,
+            "format": "jsonl",
+            "products_file": output.path.name
+        }
+
+    def _finish_output(self, products: List[Dict], query: str, filename: Optional[str]) -> str:
+        """Close the JSONL stream and write the run metadata next to it"""
+        if self.output is None:
+            output = self._open_output(query, filename)
+            if self._run is None:
+                # nothing went through the stream (products passed in directly)
+                self.summary.add_many(products)
+                output.write_many(self._new_or_changed(products))
+        output, self.output = self.output, None
+        output.close()
+        if self.dedup_index:
+            self.dedup_index.flush()
+        if self.id_journal:
+            self.id_journal.close()
+            self.id_journal = None
+
+        Path(f"{output.path}.meta.json").write_text(
+            json.dumps(self._output_metadata(output, query), indent=2, ensure_ascii=False),
+            encoding='utf-8'
+        )
+        if self._run and self._run['complete']:
+            Path(self.config.checkpoint_file).unlink(missing_ok=True)
+            Path(f"{self.config.checkpoint_file}.ids").unlink(missing_ok=True)
+        logger.info(f"💾 Results saved: {output.path}")
+        return str(output.path)
+
+    @staticmethod
+    def add_output_arguments(parser: argparse.ArgumentParser):
+        """--resume, --jsonl and --dedup-index, shared by every search scraper's CLI"""
+        parser.add_argument('--resume', action='store_true',
+                            help="continue the last interrupted search from its checkpoint")
+        parser.add_argument('--jsonl', action='store_true',
+                            help="stream products to a JSON Lines file as pages are scraped (resumable)")
+        parser.add_argument('--dedup-index', nargs='?', const='flipkart_seen.sqlite', metavar='FILE',
+                            help="only write products that are new or changed since earlier runs, "
+                                 "tracked in FILE (default: %(const)s)")
+
+    @staticmethod
+    def resume_mode(config) -> Optional[Tuple[str, Any, Optional[str]]]:
+        """Query and settings of the interrupted run recorded in config's checkpoint file"""
+        state = load_checkpoint(config.checkpoint_file)
+        if not state:
+            print("\nNo checkpoint to resume, starting a new search")
+            return None
+
+        config.resume = True
+        config.output_format = 'jsonl'
+        config.max_pages = state['max_pages']
+        config.output_file = state['output_file']
+        config.output_compression = state['compression']
+        config.dedup_index_file = state['dedup_index_file']
+        print(f"\n♻️ Resuming '{state['query']}' ({len(state['pages'])}/{state['max_pages']} pages done)")
+        return state['query'], config, state['output_file']
+
+    @classmethod
+    def settings_from_args(cls, args: argparse.Namespace, config,
+                           interactive_mode: Callable[[], Tuple[str, Any, Optional[str]]]
+                           ) -> Tuple[str, Any, Optional[str]]:
+        """(query, config, filename) from --resume or the interactive prompts, then the output flags"""
+        query, config, filename = (args.resume and cls.resume_mode(config)) or interactive_mode()
+        if args.jsonl:
+            config.output_format = 'jsonl'
+        if args.dedup_index:
+            config.dedup_index_file = args.dedup_index
+        return query, config, filename
+
+# ==================== RETRY POLICY ====================
+
+class RetryPolicy:
+    """
+    Retry policy for HTTP calls: exponential backoff with full jitter, Retry-After honoured,
+    only transient failures (connection errors, timeouts, 408/425/429/5xx) retried, and a
+    total deadline per call that includes the waits.
+    """
+    def __init__(self, max_retries: int = 3, base_delay: float = 1.0, max_delay: float = 8.0,
+                 deadline: float = 20.0, retry_statuses=frozenset({408, 425, 429, 500, 502, 503, 504}),
+                 log: Optional[logging.Logger] = None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline  # seconds per call, waits included
+        self.retry_statuses = retry_statuses
+        self.log = log or logger
+
+    def is_retryable(self, response: Optional[requests.Response] = None,
+                     error: Optional[Exception] = None) -> bool:
+        """Transient failures only; e.g. a 401 can never succeed with the same cookie"""
+        if error is not None:
+            return isinstance(error, (requests.exceptions.ConnectionError,
+                                      requests.exceptions.Timeout,
+                                      requests.exceptions.ChunkedEncodingError))
+        return response.status_code in self.retry_statuses
+
+    def backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Seconds to wait before retry number attempt + 1"""
+        if retry_after:
+            delay = self._retry_after_seconds(retry_after)
+            if delay is not None:
+                return delay
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    @staticmethod
+    def _retry_after_seconds(value: str) -> Optional[float]:
+        """Retry-After as delta-seconds or an HTTP date"""
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+    def call(self, send: Callable[[float], requests.Response], timeout: float) -> requests.Response:
+        """
+        Run send(timeout) until it succeeds, fails permanently, or retries/deadline run out.
+        Returns the last response (which may be an error status) or raises the last
+        requests exception. Per-attempt timeouts are clipped to the remaining deadline.
+        """
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            response, error = None, None
+            try:
+                response = send(max(0.1, min(timeout, deadline - time.monotonic())))
+            except requests.exceptions.RequestException as e:
+                error = e
+            if not self.is_retryable(response, error) or attempt >= self.max_retries:
+                break
+            delay = self.backoff(attempt, response.headers.get('Retry-After') if response is not None else None)
+            if time.monotonic() + delay >= deadline:
+                break
+            reason = error or f"HTTP {response.status_code}"
+            self.log.warning(f"Retry {attempt + 1}/{self.max_retries} in {delay:.1f}s ({reason})")
+            time.sleep(delay)
+            attempt += 1
+        if error is not None:
+            raise error
+        return response
+
+# ==================== RATE LIMITER ====================
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket whose refill rate (requests/second) is steered AIMD-style by responses:
+    each good one adds `increase`; a throttle signal (429/403/503, a captcha page, a failed
+    request) or a latency spike (over latency_factor x the moving average) multiplies it by
+    `decrease`. Cuts happen at most once per round trip: a response to a request sent before
+    the last cut describes the old rate, so a burst of 429s halves the rate once, not per
+    response. Thread-safe; one instance paces every request path.
+    """
+    THROTTLE_STATUSES = frozenset({403, 429, 503})
+
+    def __init__(self, rate: float = 1.0, min_rate: float = 0.1, max_rate: float = 5.0,
+                 increase: float = 0.1, decrease: float = 0.5, burst: float = 1.0,
+                 latency_factor: float = 2.0, log: Optional[logging.Logger] = None):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.burst = burst
+        self.latency_factor = latency_factor
+        self.latency: Optional[float] = None  # moving average, seconds
+        self._tokens = burst
+        self._stamp = time.monotonic()
+        self._last_cut = 0.0
+        self._lock = threading.Lock()
+        self.log = log or logger
+
+    def reserve(self) -> float:
+        """Take a token; returns the seconds to wait before sending (sleep outside any lock)"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def record(self, status: Optional[int] = None, latency: Optional[float] = None,
+               throttled: bool = False):
+        """Feed back one response; status and latency when known (browser pages have neither)"""
+        with self._lock:
+            now = time.monotonic()
+            spike = (latency is not None and self.latency is not None
+                     and latency > self.latency_factor * self.latency)
+            if latency is not None:
+                self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            if throttled or status in self.THROTTLE_STATUSES or spike:
+                if now - (latency or 0.0) >= self._last_cut:
+                    self.rate = max(self.min_rate, self.rate * self.decrease)
+                    self._last_cut = now
+                    reason = (f"HTTP {status}" if status in self.THROTTLE_STATUSES
+                              else "blocked" if throttled else "latency spike")
+                    self.log.info(f"Rate cut to {self.rate:.2f} req/s ({reason})")
+            elif status is None or status < 400:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+
+# ==================== HTTP CACHE ====================
+
+class HttpCache:
+    """
+    Content-addressed on-disk response cache. Entries are keyed by a hash of method, URL,
+    request body and caller identity (see CachingAdapter.vary), stored zlib-compressed, expire per endpoint (first URL fragment in `ttls`
+    that matches), and are evicted least-recently-used once the directory exceeds max_bytes.
+    """
+    # not replayed from cache: the body is stored decoded, and cookies belong to the live session
+    SKIP_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'set-cookie'}
+
+    def __init__(self, directory: str, ttls: Dict[str, float], max_bytes: int = 256 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttls = ttls
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = sum(p.stat().st_size for p in self.directory.glob('*/*.z'))
+
+    def ttl_for(self, url: str) -> float:
+        for fragment, ttl in self.ttls.items():
+            if fragment in url:
+                return ttl
+        return 0
+
+    @staticmethod
+    def key(method: str, url: str, body: Any = None, identity: str = '') -> str:
+        digest = hashlib.sha256(f"{method} {url}\n".encode())
+        if identity:
+            digest.update(hashlib.sha256(identity.encode()).digest())
+        if body:
+            digest.update(body if isinstance(body, bytes) else str(body).encode())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.z"
+
+    def get(self, key: str, ttl: float) -> Optional[tuple[Dict[str, Any], bytes]]:
+        """(meta, body) of a fresh entry, or None"""
+        path = self._path(key)
+        try:
+            meta, _, body = zlib.decompress(path.read_bytes()).partition(b'\n')
+            meta = json.loads(meta)
+        except (OSError, ValueError, zlib.error):
+            return None
+        if time.time() - meta['stored'] > ttl:
+            return None
+        try:
+            os.utime(path)  # mtime doubles as last-use time for LRU eviction
+        except OSError:
+            pass
+        return meta, body
+
+    def put(self, key: str, url: str, status: int, headers: Dict[str, str], body: bytes):
+        meta = {
+            'url': url,
+            'status': status,
+            'stored': time.time(),
+            'headers': {k: v for k, v in headers.items() if k.lower() not in self.SKIP_HEADERS}
+        }
+        data = zlib.compress(json.dumps(meta).encode() + b'\n' + body)
+        path = self._path(key)
+        try:
+            path.parent.mkdir(exist_ok=True)
+            old_size = path.stat().st_size if path.exists() else 0
+            tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        except OSError:
+            return
+        with self._lock:
+            self._size += len(data) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is under 90% of max_bytes (lock held)"""
+        entries = []
+        for path in self.directory.glob('*/*.z'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        for _, size, path in sorted(entries):
+            if self._size <= self.max_bytes * 0.9:
+                break
+            try:
+                path.unlink()
+                self._size -= size
+            except OSError:
+                continue
+
+class CachingAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that serves fresh HttpCache entries and stores 200 responses; `storable`
+    can veto responses that must not be replayed (bot-wall pages, error payloads). Values of
+    the request headers named in `vary` (e.g. Cookie for authenticated APIs) are part of the
+    key, so one account's responses are never served to another.
+    """
+    def __init__(self, cache: HttpCache, storable: Optional[Callable[[requests.Response], bool]] = None,
+                 vary: tuple = (), **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+        self.storable = storable
+        self.vary = vary
+
+    def send(self, request, **kwargs):
+        ttl = self.cache.ttl_for(request.url)
+        if ttl <= 0 or request.method not in ('GET', 'POST'):
+            return super().send(request, **kwargs)
+        identity = '\n'.join(request.headers.get(name, '') for name in self.vary)
+        key = self.cache.key(request.method, request.url, request.body, identity)
+        # Cache-Control: no-cache on the request skips the lookup (the response is still stored)
+        if request.headers.get('Cache-Control') != 'no-cache':
+            hit = self.cache.get(key, ttl)
+            if hit is not None:
+                return self._cached_response(request, *hit)
+        response = super().send(request, **kwargs)
+        if response.status_code == 200 and (self.storable is None or self.storable(response)):
+            self.cache.put(key, request.url, response.status_code, response.headers, response.content)
+        return response
+
+    def _cached_response(self, request, meta: Dict[str, Any], body: bytes) -> requests.Response:
+        response = requests.Response()
+        response.status_code = meta['status']
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(meta['headers'])
+        response._content = body
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.from_cache = True
+        return response
+
+# ==================== TIMINGS ====================
+
+class StageTimings:
+    """
+    Latency histograms per pipeline stage (http.ttfb, parse.html, field.title, save.results, ...).
+
+    Cheap enough to leave on: a sample is one log() plus a few dict and list updates, taken
+    without a lock (a lost update under threads only undercounts a bucket). Durations fall
+    into log-spaced buckets 5% wide from 1µs up, so percentiles read off the buckets are
+    within 5% and a stage holds a few hundred counters at most however long the run.
+    """
+    FLOOR = 1e-6  # seconds; anything faster lands in bucket 0
+    GROWTH = 1.05
+
+    def __init__(self):
+        self.buckets: Dict[str, Dict[int, int]] = {}
+        self.totals: Dict[str, List[float]] = {}  # stage -> [count, sum, max] in seconds
+        self._log_growth = math.log(self.GROWTH)
+
+    def record(self, stage: str, seconds: float):
+        bucket = int(math.log(max(seconds, self.FLOOR) / self.FLOOR) / self._log_growth)
+        hist = self.buckets.get(stage)
+        if hist is None:
+            self.totals.setdefault(stage, [0, 0.0, 0.0])
+            hist = self.buckets.setdefault(stage, {})
+        hist[bucket] = hist.get(bucket, 0) + 1
+        totals = self.totals[stage]
+        totals[0] += 1
+        totals[1] += seconds
+        if seconds > totals[2]:
+            totals[2] = seconds
+
+    def time(self, stage: str) -> '_StageTimer':
+        """Context manager recording the duration of its block under stage"""
+        return _StageTimer(self, stage)
+
+    def percentile(self, stage: str, q: float) -> float:
+        """Approximate q-quantile (0..1) in seconds: geometric middle of the bucket holding it"""
+        hist = self.buckets.get(stage)
+        if not hist:
+            return 0.0
+        rank = q * sum(hist.values())
+        seen = 0
+        for bucket in sorted(hist):
+            seen += hist[bucket]
+            if seen >= rank:
+                break
+        return min(self.FLOOR * self.GROWTH ** (bucket + 0.5), self.totals[stage][2])
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """{stage: {count, total_ms, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}"""
+        out = {}
+        for stage in sorted(self.totals):
+            count, total, peak = self.totals[stage]
+            out[stage] = {
+                'count': count,
+                'total_ms': round(total * 1000, 3),
+                'mean_ms': round(total / count * 1000, 3) if count else 0.0,
+                'p50_ms': round(self.percentile(stage, 0.50) * 1000, 3),
+                'p95_ms': round(self.percentile(stage, 0.95) * 1000, 3),
+                'p99_ms': round(self.percentile(stage, 0.99) * 1000, 3),
+                'max_ms': round(peak * 1000, 3)
+            }
+        return out
+
+    def histograms(self) -> Dict[str, Dict[str, int]]:
+        """Raw buckets per stage as {bucket upper bound in ms: count}"""
+        return {
+            stage: {f"{self.FLOOR * self.GROWTH ** (bucket + 1) * 1000:.6g}": count
+                    for bucket, count in sorted(hist.items())}
+            for stage, hist in sorted(self.buckets.items())
+        }
+
+    def export(self, path: str):
+        """Summary and histograms as JSON (overwritten once per run)"""
+        Path(path).write_text(json.dumps({
+            "timestamp": datetime.now().isoformat(),
+            "summary": self.summary(),
+            "histograms": self.histograms()
+        }, indent=2), encoding='utf-8')
+
+    def report(self) -> str:
+        """Per-run table of count, mean, p50/p95/p99 and max per stage (ms)"""
+        lines = [f"{'Stage':<28}{'Count':>8}{'Mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'Max':>10}"]
+        for stage, s in self.summary().items():
+            lines.append(f"{stage:<28}{s['count']:>8,}{s['mean_ms']:>10.3f}{s['p50_ms']:>10.3f}"
+                         f"{s['p95_ms']:>10.3f}{s['p99_ms']:>10.3f}{s['max_ms']:>10.3f}")
+        return "\n".join(lines)
+
+class _StageTimer:
+    __slots__ = ('timings', 'stage', 'start')
+
+    def __init__(self, timings: StageTimings, stage: str):
+        self.timings = timings
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.record(self.stage, time.perf_counter() - self.start)
+
+# StageTimings that connections opened by the current thread's request report to
+timing_context = threading.local()
+
+class _TimedConnectionMixin:
+    """New connections record http.connect (DNS lookup + TCP handshake); reused ones record nothing"""
+    def _new_conn(self):
+        start = time.perf_counter()
+        sock = super()._new_conn()
+        self._connect_seconds = time.perf_counter() - start
+        timings = getattr(timing_context, 'timings', None)
+        if timings is not None:
+            timings.record('http.connect', self._connect_seconds)
+        return sock
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    """Also records http.tls: the rest of connect() after the TCP handshake"""
+    def connect(self):
+        start = time.perf_counter()
+        self._connect_seconds = 0.0
+        super().connect()
+        timings = getattr(timing_context, 'timings', None)
+        if timings is not None:
+            timings.record('http.tls', time.perf_counter() - start - self._connect_seconds)
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+def time_connections(adapter: HTTPAdapter) -> HTTPAdapter:
+    """Make an adapter's pools open connections that report their setup time"""
+    adapter.poolmanager.pool_classes_by_scheme = {
+        'http': _TimedHTTPConnectionPool,
+        'https': _TimedHTTPSConnectionPool
+    }
+    return adapter
@@ -0,0 +1,70 @@
+"""
+The soup and lxml parser backends of 6fliptimeconsume.py must turn the same saved results
+page into the same products, field for field.
+"""
+
+import importlib.util
+import logging
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURE = Path(__file__).resolve().parent / 'fixtures' / 'search_results.html'
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))  # scraper_common
+
+def _load_scraper():
+    """The script name starts with a digit, so it is loaded from its path"""
+    spec = importlib.util.spec_from_file_location('fliptimeconsume', ROOT / '6fliptimeconsume.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.logger = logging.getLogger('fliptimeconsume')  # set under __main__ when run as a script
+    return module
+
+fk = _load_scraper()
+
+def _scraper(backend: str):
+    config = fk.ScraperConfig()
+    config.parser_backend = backend
+    config.http_cache_dir = None
+    config.revalidate_dir = None
+    config.timings_file = None
+    return fk.RobustFlipkartScraper(config)
+
+def _products(backend: str, strategy: str):
+    content = FIXTURE.read_bytes()
+    doc = fk.PageDocument('https://www.flipkart.com/search?q=mobiles&page=2', 2, 200, content)
+    doc.parse(backend)
+    scraper = _scraper(backend)
+    try:
+        products = getattr(scraper, f'_parse_{strategy}_strategy')(doc)
+    finally:
+        scraper.close()
+    return [p.to_dict() for p in products]
+
+@pytest.mark.parametrize('strategy', ['container', 'anchor'])
+def test_backends_extract_identical_products(strategy):
+    soup_products = _products('soup', strategy)
+    lxml_products = _products('lxml', strategy)
+    assert soup_products, "fixture should yield products"
+    assert lxml_products == soup_products
+
+def test_container_strategy_reads_every_field():
+    products = {p['product_id']: p for p in _products('lxml', 'container')}
+    phone = products['MOBGHWFHECFVMDCX']
+    assert phone['title'] == 'SAMSUNG Galaxy M14 5G (Smoky Teal, 128 GB)'
+    assert (phone['price'], phone['original_price'], phone['discount']) == (13490, 17990, 25)
+    assert (phone['rating'], phone['rating_count']) == (4.2, 123456)
+    assert phone['thumbnail'].endswith('/mobghwfhecfvmdcx.jpg?q=70')
+    assert phone['page_number'] == 2
+    assert products['ACCG2XZ7ZRHZUYFN']['in_stock'] is False
+
+def test_inline_script_style_and_template_text_is_ignored():
+    for backend in ('soup', 'lxml'):
+        products = {p['product_id']: p for p in _products(backend, 'container')}
+        poco = products['MOBGZ9RKQHJXYT3N']
+        assert poco['title'] == 'POCO M6 Pro 5G (Power Black, 64 GB)'
+        assert (poco['price'], poco['original_price']) == (9499, 16999)